@@ -0,0 +1,184 @@
+# analysis_jobs.py
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+import hashlib
+import io
+import threading
+import time
+import uuid
+from color_extraction import extract_coarse_palette, extract_palette_cached
+from llm import ask_gemini, remember_exchange
+from job_queue import POLL_INTERVAL, QueuedJob, submit, live_workers
+from palette_compare import extract_in_parallel
+
+# Used when no worker.py process is running (e.g. a plain `streamlit run` in development),
+# including for queued jobs whose workers stopped before finishing them
+BACKGROUND_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="huebot-analysis")
+RESULT_TIMEOUT = 120.0  # seconds a page waits for a palette or an answer before giving up
+
+# HueBot only sees the prompt, so a session reuses its earlier answer for any upload that
+# yields the same palette (including near-duplicate screenshots, which reuse the same
+# palette). The cache, and the dedupe key of queued analysis jobs, belong to the session
+# so answers never cross between sessions.
+ANALYSIS_CACHE_SIZE = 32
+_analysis_lock = threading.Lock()
+
+
+class SessionAnswers(OrderedDict):
+    """One session's HueBot answers by prompt (most recently used last); keep it in session state."""
+
+    def __init__(self):
+        super().__init__()
+        self.session_id = uuid.uuid4().hex
+
+
+def _remember(answers, prompt, response):
+    with _analysis_lock:
+        answers[prompt] = response
+        answers.move_to_end(prompt)
+        while len(answers) > ANALYSIS_CACHE_SIZE:
+            answers.popitem(last=False)
+
+
+def _ask_and_remember(prompt, chat_session, answers):
+    response = ask_gemini(prompt, chat_session)
+    _remember(answers, prompt, response)
+    return response
+
+
+def _cached_analysis(prompt, chat_session, answers):
+    with _analysis_lock:
+        if prompt not in answers:
+            return None
+        answers.move_to_end(prompt)
+        response = answers[prompt]
+    # Keep the conversation coherent for follow-up questions, as if it had been asked again
+    remember_exchange(chat_session, prompt, response)
+    done = Future()
+    done.set_result(response)
+    return done
+
+
+class _QueuedAnalysis(QueuedJob):
+    """Queued HueBot job whose answer joins the session's cache and chat history once collected.
+
+    Workers answer from a fresh chat session, so the session only learns of
+    the exchange here; the in-process fallback asks through ``chat_session``
+    and records it itself.
+    """
+
+    def __init__(self, job_id, prompt, chat_session, answers):
+        super().__init__(job_id, fallback=lambda: BACKGROUND_POOL.submit(_ask_and_remember, prompt, chat_session, answers))
+        self._session = (prompt, chat_session, answers)
+        self._recorded = False
+
+    def result(self, timeout=None):
+        response = super().result(timeout)
+        if not self._recorded and not self.in_process:
+            prompt, chat_session, answers = self._session
+            _remember(answers, prompt, response)
+            remember_exchange(chat_session, prompt, response)
+            self._recorded = True
+        return response
+
+
+# -------------------- JOB SUBMISSION --------------------
+def submit_palette(image_bytes, k=5):
+    """Future-like handle on the full palette, computed by a worker process when one is running."""
+    if live_workers():
+        key = f"palette:{hashlib.sha256(image_bytes).hexdigest()}:{k}"
+        job_id = submit("palette", {"image_bytes": image_bytes, "k": k}, key)
+        return QueuedJob(job_id, fallback=lambda: BACKGROUND_POOL.submit(extract_palette_cached, image_bytes, k))
+    return BACKGROUND_POOL.submit(extract_palette_cached, image_bytes, k)
+
+
+def submit_analysis(prompt, chat_session, answers):
+    """Future-like handle on HueBot's answer to ``prompt``.
+
+    ``answers`` is the session's SessionAnswers cache. Every answer ends up in it and in ``chat_session``'s history, so
+    follow-up questions see it: cached and worker answers are added when
+    collected, in-process ones are asked through ``chat_session`` itself.
+    """
+    cached = _cached_analysis(prompt, chat_session, answers)
+    if cached is not None:
+        return cached
+    if live_workers():
+        key = f"analysis:{answers.session_id}:{hashlib.sha256(prompt.encode()).hexdigest()}"
+        return _QueuedAnalysis(submit("analysis", {"prompt": prompt}, key), prompt, chat_session, answers)
+    return BACKGROUND_POOL.submit(_ask_and_remember, prompt, chat_session, answers)
+
+
+def queue_position(handle):
+    """Jobs waiting ahead of ``handle`` in the worker queue, or None for in-process work."""
+    return handle.position() if isinstance(handle, QueuedJob) else None
+
+
+def extract_variants(uploads, k=5, on_wait=None):
+    """Yield ``(name, (colors, weights))`` for every upload in completion order.
+
+    With workers running, all uploads are queued at once and ``on_wait(name,
+    position)`` is called whenever a pending upload's queue position changes;
+    otherwise extraction runs on a local thread pool.
+    """
+    if not live_workers():
+        yield from extract_in_parallel(uploads, lambda data: extract_palette_cached(data, k))
+        return
+
+    pending = {name: submit_palette(data, k) for name, data in uploads.items()}
+    positions = {}
+    while pending:
+        for name, handle in list(pending.items()):
+            if handle.done():
+                del pending[name]
+                yield name, handle.result()
+                continue
+            position = handle.position() if on_wait is not None else None
+            if position is not None and positions.get(name) != position:
+                positions[name] = position
+                on_wait(name, position)
+        if pending:
+            time.sleep(POLL_INTERVAL)
+
+
+class AnalysisJob:
+    """Two-stage analysis of one upload.
+
+    ``coarse`` is available immediately; ``refined`` (full KMeans palette) and
+    ``llm`` (HueBot's answer for the refined palette) are future-like handles
+    on worker jobs (or BACKGROUND_POOL) so the page never blocks on them while
+    rendering.
+    """
+
+    def __init__(self, key, image_bytes, k):
+        self.key = key
+        self.k = k
+        self.started = time.monotonic()
+        self.coarse = extract_coarse_palette(io.BytesIO(image_bytes), k)
+        self.refined = submit_palette(image_bytes, k)
+        self.llm = None
+        self.prompt = None
+
+    def refined_overdue(self):
+        """True once the refined palette has been pending for longer than RESULT_TIMEOUT."""
+        return not self.refined.done() and time.monotonic() - self.started > RESULT_TIMEOUT
+
+    def start_llm(self, prompt, chat_session, answers):
+        """Start the HueBot request for ``prompt`` once; later calls reuse the same future."""
+        if self.llm is None or self.prompt != prompt:
+            self.prompt = prompt
+            self.llm = submit_analysis(prompt, chat_session, answers)
+        return self.llm
+
+
+def get_analysis_job(jobs, image_bytes, k=5):
+    """Return the job for this upload from ``jobs`` (e.g. session state), starting it if new.
+
+    Only the latest upload is kept per session.
+    """
+    key = (hashlib.sha256(image_bytes).hexdigest(), k)
+    job = jobs.get(key)
+    if job is None:
+        jobs.clear()
+        job = AnalysisJob(key, image_bytes, k)
+        jobs[key] = job
+    return job
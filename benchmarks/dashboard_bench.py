@@ -0,0 +1,253 @@
+# benchmarks/dashboard_bench.py
+"""Time and memory of the dashboard's code paths at growing data volumes.
+
+For every size a synthetic dataset is generated (and kept for reuse), then
+a fresh interpreter runs the same calls pages/dashboard.py makes, in page
+order: cold index builds and loads, a rerun's loads, filtering, the
+aggregations behind each section, chart preparation including the JSON
+sent to the browser, table paging and the streamed export.
+
+    python benchmarks/dashboard_bench.py --sizes 10000 100000 1000000
+    python benchmarks/dashboard_bench.py --sizes 10000000
+
+Memory is reported as the growth of the process's peak resident set size
+during each stage (Linux only).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+RSS_SAMPLE_INTERVAL = 0.005
+
+
+def current_rss():
+    """Resident set size in bytes (Linux /proc; None elsewhere)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+class RssSampler:
+    """Background thread tracking the peak resident set size while a stage runs.
+
+    tracemalloc would see every allocation but slows pandas string handling
+    by an order of magnitude, which distorts the timings being measured.
+    """
+
+    def __init__(self):
+        self.start_rss = self.peak = current_rss()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_INTERVAL):
+            self.peak = max(self.peak, current_rss())
+
+    def __enter__(self):
+        if self.start_rss is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        if self.start_rss is not None:
+            self._stop.set()
+            self._thread.join()
+            self.peak = max(self.peak, current_rss())
+
+
+@contextmanager
+def stage(results, name, track_memory):
+    """Record wall time and the growth of peak RSS over one stage."""
+    sampler = RssSampler() if track_memory else None
+    start = time.perf_counter()
+    try:
+        if sampler is None:
+            yield
+        else:
+            with sampler:
+                yield
+    finally:
+        row = {"stage": name, "seconds": time.perf_counter() - start}
+        if sampler is not None and sampler.start_rss is not None:
+            row["peak_mb"] = (sampler.peak - sampler.start_rss) / 1e6
+        results.append(row)
+        print(json.dumps(row), flush=True)
+
+
+def run_dashboard_paths(path, track_memory):
+    """Execute the dashboard's data paths against ``path``; one JSON line per stage on stdout."""
+    import pandas as pd
+    import plotly.express as px
+    from storage import load_compact_feedback
+    from color_utils import NO_COLOR, packed_to_rgb, rgb_to_hex, mean_color
+    from rollups import ROLLUPS, load_rollups, filter_rollups, summarize_rollups
+    from color_index import COLOR_INDEX, top_preferred_colors
+    from color_stats import COLOR_STATS, filtered_moments, correlations, regression, effect_sizes
+    from contrast import feedback_contrast
+    from distinct_users import USER_SKETCHES, EXACT_COUNT_MAX_ROWS, estimate_distinct_users
+    from comment_index import COMMENT_INDEX, search_comments, term_frequencies
+    from recommender import ENGAGEMENT_STATS, load_candidates, recommend_palettes, theme_scores
+    from chart_data import box_stats, box_figure, table_page
+    from export import export_filtered
+
+    results = []
+    with stage(results, "load: build indexes (cold)", track_memory):
+        for sidecar in (ROLLUPS, COLOR_INDEX, COLOR_STATS, USER_SKETCHES, COMMENT_INDEX, ENGAGEMENT_STATS):
+            sidecar.load(path)
+    with stage(results, "load: compact frame (cold)", track_memory):
+        df = load_compact_feedback(path)
+    with stage(results, "load: rerun (memoised)", track_memory):
+        rollups = load_rollups(path)
+        df = load_compact_feedback(path)
+
+    with stage(results, "recommendations: build candidates (cold)", track_memory):
+        load_candidates(path)
+
+    apps, themes = list(rollups["app_type"].unique()), list(rollups["theme_name"].unique())
+    start, end = rollups["date"].min(), rollups["date"].max()
+    selections = {
+        "all": (apps, themes, start, end),
+        "narrow": (apps[:1], themes, end - pd.Timedelta(days=30), end),
+    }
+
+    for label, (app_filter, theme_filter, first, last) in selections.items():
+        with stage(results, f"filter: {label}", track_memory):
+            filtered_df = df[
+                (df["app_type"].isin(app_filter)) &
+                (df["theme_name"].isin(theme_filter)) &
+                (df["date"] >= pd.to_datetime(first)) &
+                (df["date"] <= pd.to_datetime(last))
+            ]
+            filtered_rollups = filter_rollups(rollups, app_filter, theme_filter, first, last)
+        print(json.dumps({"selection": label, "rows": len(filtered_df)}), flush=True)
+
+        with stage(results, f"overview: {label}", track_memory):
+            overview = summarize_rollups(filtered_rollups).iloc[0]
+            if overview["count"] <= EXACT_COUNT_MAX_ROWS:
+                len(filtered_df[["user_id_hi", "user_id_lo"]].drop_duplicates())
+            else:
+                estimate_distinct_users(app_filter, theme_filter, first, last, path=path)
+            top_preferred_colors(app_filter, theme_filter, first, last, n=1, path=path)
+
+        with stage(results, f"charts: {label}", track_memory):
+            figures = [
+                box_figure(box_stats(filtered_df, "theme_name", "rating"), "theme_name", "Ratings", "rating"),
+                px.bar(summarize_rollups(filtered_rollups, by="theme_name"), x="theme_name", y="engagement_mean"),
+                px.bar(
+                    summarize_rollups(filtered_rollups, by="app_type")[["app_type", "rating_mean", "engagement_mean"]]
+                    .melt(id_vars="app_type"),
+                    x="app_type", y="value", color="variable", barmode="group",
+                ),
+            ]
+            payload = sum(len(figure.to_json()) for figure in figures)
+        print(json.dumps({"selection": label, "chart_json_bytes": payload}), flush=True)
+
+        with stage(results, f"colors + contrast: {label}", track_memory):
+            for section in ["landing_color", "header_color", "button_color", "background_color", "text_color"]:
+                packed = filtered_df[section].to_numpy()
+                packed = packed[packed != NO_COLOR]
+                if packed.size:
+                    rgb_to_hex(mean_color(packed_to_rgb(packed)))
+            feedback_contrast(filtered_df)
+
+        with stage(results, f"leaderboard: {label}", track_memory):
+            top_preferred_colors(app_filter, theme_filter, first, last, n=10, path=path)
+        with stage(results, f"leaderboard grouped: {label}", track_memory):
+            top_preferred_colors(app_filter, theme_filter, first, last, n=10, max_delta_e=5.0, path=path)
+
+        with stage(results, f"correlations: {label}", track_memory):
+            moments_all, moments_pass, moments_fail = filtered_moments(app_filter, theme_filter, first, last, path=path)
+            if moments_all[0] > 2:
+                correlations(moments_all)
+                regression(moments_all, "rating")
+                regression(moments_all, "engagement_score")
+                effect_sizes(moments_pass, moments_fail)
+
+        with stage(results, f"recommendations: {label}", track_memory):
+            recommend_palettes(sorted(app_filter)[0], n=5, path=path)
+            theme_scores(sorted(app_filter)[0], path=path)
+
+        with stage(results, f"comment search + words: {label}", track_memory):
+            matches = search_comments('contrast "hard to see"', app_filter, theme_filter, first, last, path=path)
+            table_page(df.iloc[matches[matches < len(df)]], "date", False, 1, 100)
+            term_frequencies(app_filter, theme_filter, first, last, n=10, path=path)
+
+        with stage(results, f"table page: {label}", track_memory):
+            table_page(filtered_df, "date", False, 1, 50)
+            table_page(filtered_df, "rating", True, max(1, len(filtered_df) // 100), 50)
+
+    with stage(results, "export: CSV (gzip), all rows", track_memory):
+        with export_filtered("CSV (gzip)", *selections["all"], path=path) as exported:
+            exported.seek(0, os.SEEK_END)
+    return results
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # kilobytes on Linux
+
+
+def benchmark_size(rows, data_dir, track_memory):
+    """Generate (or reuse) a dataset of ``rows`` rows and benchmark it in a fresh interpreter."""
+    from benchmarks.generate_feedback import generate
+
+    path = os.path.join(data_dir, f"feedback_{rows}.csv")
+    if not os.path.exists(path):
+        start = time.perf_counter()
+        generate(rows, path)
+        print(f"  generated {path} in {time.perf_counter() - start:.1f}s")
+    shutil.rmtree(os.path.join(data_dir, ".indexes"), ignore_errors=True)  # measure cold index builds
+
+    command = [sys.executable, os.path.abspath(__file__), "--run", path] + ([] if track_memory else ["--no-memory"])
+    out = subprocess.run(command, cwd=ROOT, capture_output=True, text=True, check=True).stdout
+    return [json.loads(line) for line in out.splitlines() if line.startswith("{")]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="row counts (10k-10M)")
+    parser.add_argument("--data-dir", default=os.path.join(ROOT, ".benchmark_data"))
+    parser.add_argument("--no-memory", action="store_true", help="skip RSS sampling")
+    parser.add_argument("--json", help="also write all results to this file")
+    parser.add_argument("--run", help=argparse.SUPPRESS)  # internal: benchmark one file in this process
+    args = parser.parse_args()
+
+    if args.run:
+        run_dashboard_paths(args.run, not args.no_memory)
+        print(json.dumps({"peak_rss_mb": peak_rss_mb()}), flush=True)
+        return
+
+    os.makedirs(args.data_dir, exist_ok=True)
+    report = {}
+    for rows in args.sizes:
+        print(f"== {rows:,} rows")
+        lines = benchmark_size(rows, args.data_dir, not args.no_memory)
+        report[rows] = lines
+        for line in lines:
+            if "stage" in line:
+                memory = f"{line['peak_mb']:>10.1f} MB" if "peak_mb" in line else ""
+                print(f"  {line['stage']:<38}{line['seconds']:>9.3f} s{memory}")
+            else:
+                print("  " + ", ".join(f"{k}={v:,}" if isinstance(v, (int, float)) else f"{k}={v}" for k, v in line.items()))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+# benchmarks/generate_feedback.py
+"""Synthetic feedback datasets in the schema written by pages/interact.py.
+
+Distributions are skewed the way real traffic is: a few app types and themes
+dominate, colors cluster around each theme's hue with a long tail of one-off
+picks, users come back several times, recent days are busier, and most
+submissions have no comment.
+
+    python benchmarks/generate_feedback.py --rows 1000000 --out /tmp/feedback_1m.csv
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from storage import APP_TYPES, THEME_NAMES, FEEDBACK_COLUMNS  # noqa: E402
+from color_utils import hsl_to_rgb, rgb_to_hex  # noqa: E402
+
+CHUNK_ROWS = 250_000
+DAYS = 365
+END_DATE = "2025-08-31"
+
+# Hue (degrees) each theme's colors gather around
+THEME_HUES = {"Dark Blue": 225, "Soft Green": 120, "Vibrant Orange": 28, "Minimal Gray": 210, "Neon Pink": 320}
+THEME_SATURATION = {"Minimal Gray": 0.08}
+SECTIONS = ["landing_color", "header_color", "button_color", "background_color", "text_color"]
+
+COMMENTS = np.array([
+    "Love the contrast", "Too bright for night use", "Buttons are hard to see",
+    "Feels calm and trustworthy", "The header color, honestly, is distracting",
+    'Text is "fine" but a bit small', "Great palette!\nWould use again",
+    "Colors feel dated", "Easy on the eyes", "Not accessible enough for me",
+], dtype=object)
+COMMENT_RATE = 0.3
+
+
+def zipf_weights(n, exponent=1.1):
+    weights = 1 / np.arange(1, n + 1) ** exponent
+    return weights / weights.sum()
+
+
+def _splitmix64(x):
+    x = (x + np.uint64(0x9E3779B97F4A7C15)).astype(np.uint64)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def user_uuids(user_index, seed=0):
+    """Version-4 UUID strings derived from user numbers, so the user pool never has to be held in memory."""
+    index = np.asarray(user_index, dtype=np.uint64) * np.uint64(2) + np.uint64(seed << 40)
+    raw = np.stack([_splitmix64(index), _splitmix64(index + np.uint64(1))], axis=1).view(np.uint8)
+    n = len(raw)
+    raw[:, 6] = (raw[:, 6] & 0x0F) | 0x40
+    raw[:, 8] = (raw[:, 8] & 0x3F) | 0x80
+    hex_chars = np.frombuffer(raw.tobytes().hex().encode(), dtype="S1").reshape(n, 32)
+    dashed = np.insert(hex_chars, [8, 12, 16, 20], b"-", axis=1)
+    return np.ascontiguousarray(dashed).view("S36").ravel().astype(str)
+
+
+class FeedbackGenerator:
+    """Draws feedback rows chunk by chunk with fixed, seeded popularity distributions."""
+
+    def __init__(self, rows, seed=0, palette_size=400):
+        self.rng = np.random.default_rng(seed)
+        rng = self.rng
+        self.app_types = np.array(APP_TYPES, dtype=object)[rng.permutation(len(APP_TYPES))]
+        self.app_weights = zipf_weights(len(APP_TYPES))
+        self.themes = np.array(THEME_NAMES, dtype=object)[rng.permutation(len(THEME_NAMES))]
+        self.theme_weights = zipf_weights(len(THEME_NAMES), 0.8)
+
+        # Per-theme popular colors (Zipf-weighted); _colors adds random one-offs on top
+        self.theme_palettes = {theme: self._palette(theme, palette_size) for theme in THEME_NAMES}
+        self.palette_weights = zipf_weights(palette_size)
+        self.seed = seed
+        self.user_weights = zipf_weights(max(1, rows // 3), 0.6)  # on average three submissions per user
+        day_weights = np.linspace(1, 4, DAYS)  # traffic grows over the year
+        self.day_weights = day_weights / day_weights.sum()
+        self.days = pd.date_range(end=END_DATE, periods=DAYS).strftime("%Y-%m-%d").to_numpy()
+
+    def _palette(self, theme, size):
+        rng = self.rng
+        hue = (THEME_HUES[theme] + rng.normal(0, 25, size)) % 360
+        saturation = np.clip(rng.normal(THEME_SATURATION.get(theme, 0.65), 0.15, size), 0, 1)
+        lightness = np.clip(rng.beta(2, 2, size), 0.03, 0.97)
+        return np.asarray(rgb_to_hex(hsl_to_rgb(np.stack([hue, saturation, lightness], axis=1))), dtype=object)
+
+    def _colors(self, themes, tail_rate=0.15):
+        """One color per row: a popular color of the row's theme, or a random one-off."""
+        rng = self.rng
+        n = len(themes)
+        out = np.empty(n, dtype=object)
+        picks = rng.choice(len(self.palette_weights), size=n, p=self.palette_weights)
+        for theme, palette in self.theme_palettes.items():
+            rows = themes == theme
+            out[rows] = palette[picks[rows]]
+        tail = rng.random(n) < tail_rate
+        out[tail] = rgb_to_hex(rng.integers(0, 256, size=(int(tail.sum()), 3)))
+        return out
+
+    def _color_lists(self, themes, counts):
+        """'#aaaaaa, #bbbbbb, ...' strings holding ``counts[i]`` colors each."""
+        joined = self._colors(themes).astype("U7")
+        for _ in range(4):
+            joined = np.char.add(np.char.add(joined, ", "), self._colors(themes).astype("U7"))
+        # Blank everything past the last wanted color; NumPy drops trailing NULs from fixed-width strings
+        chars = joined.astype("U43").view("U1").reshape(len(joined), 43)
+        chars[np.arange(43) >= (9 * counts - 2)[:, None]] = ""
+        return chars.view("U43").ravel().astype(object)
+
+    def chunk(self, n):
+        rng = self.rng
+        themes = rng.choice(self.themes, size=n, p=self.theme_weights)
+        rating = rng.choice(np.arange(1, 6), size=n, p=[0.06, 0.1, 0.24, 0.34, 0.26])
+        engagement = np.clip(np.round(rng.normal(50 + 9 * (rating - 3), 14)), 0, 100).astype(int)
+
+        # The form submits all five pickers unless the user clears some
+        preferred_colors = self._color_lists(themes, rng.choice(np.arange(1, 6), size=n, p=[0.05, 0.05, 0.1, 0.1, 0.7]))
+
+        comments = np.full(n, "", dtype=object)
+        has_comment = rng.random(n) < COMMENT_RATE
+        comments[has_comment] = rng.choice(COMMENTS, size=int(has_comment.sum()))
+
+        frame = pd.DataFrame({
+            "user_id": user_uuids(rng.choice(len(self.user_weights), size=n, p=self.user_weights), self.seed),
+            "app_type": rng.choice(self.app_types, size=n, p=self.app_weights),
+            "theme_name": themes,
+            "preferred_colors": preferred_colors,
+            "dominant_color": self._colors(themes),
+            "rating": rating,
+            "engagement_score": engagement,
+            "comments": comments,
+        })
+        for section in SECTIONS:
+            frame[section] = self._colors(themes)
+        frame["date"] = rng.choice(self.days, size=n, p=self.day_weights)
+        return frame[FEEDBACK_COLUMNS]
+
+
+def generate(rows, out, seed=0, chunk_rows=CHUNK_ROWS):
+    """Write ``rows`` synthetic feedback rows to ``out`` in chunks (memory stays flat at any size)."""
+    generator = FeedbackGenerator(rows, seed)
+    written = 0
+    with open(out, "w", newline="", encoding="utf-8") as f:
+        while written < rows:
+            n = min(chunk_rows, rows - written)
+            generator.chunk(n).to_csv(f, header=written == 0, index=False)
+            written += n
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10_000, help="number of rows (e.g. 10000 to 10000000)")
+    parser.add_argument("--out", default="synthetic_feedback.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    generate(args.rows, args.out, args.seed)
+    size_mb = os.path.getsize(args.out) / 1e6
+    print(f"Wrote {args.rows:,} rows ({size_mb:.1f} MB) to {args.out} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
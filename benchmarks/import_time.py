@@ -0,0 +1,65 @@
+# benchmarks/import_time.py
+"""Cold-start import cost of every page.
+
+Each page's top-level imports are executed in a fresh interpreter (so nothing
+is cached in sys.modules) and timed; the median of several runs is reported
+next to the eager ``helper`` module the pages used to depend on.
+
+    python benchmarks/import_time.py [--runs 5]
+"""
+import argparse
+import ast
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PAGES = ["home.py", "pages/about.py", "pages/interact.py", "pages/dashboard.py", "pages/chatbot.py", "pages/analysis.py"]
+
+# What `import helper` cost before it was split: every heavy dependency, plus configuring Gemini
+LEGACY_HELPER = """
+import streamlit, dotenv, PIL.Image, numpy, sklearn.cluster
+import google.generativeai as genai
+genai.configure(api_key=None)
+"""
+
+_TIMER = """
+import sys, time
+sys.path.insert(0, {root!r})
+start = time.perf_counter()
+{imports}
+print(time.perf_counter() - start)
+"""
+
+
+def page_imports(path):
+    """Source of the top-level import statements of a page."""
+    with open(os.path.join(ROOT, path), encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    return "\n".join(ast.unparse(node) for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom)))
+
+
+def time_imports(imports, runs):
+    """Median wall time in seconds of running ``imports`` in ``runs`` fresh interpreters."""
+    script = _TIMER.format(root=ROOT, imports=imports)
+    timings = []
+    for _ in range(runs):
+        out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, capture_output=True, text=True, check=True)
+        timings.append(float(out.stdout.strip().splitlines()[-1]))
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = [("helper (before split)", LEGACY_HELPER)] + [(page, page_imports(page)) for page in PAGES]
+    print(f"{'imports of':<24}{'median (s)':>12}")
+    for name, imports in rows:
+        print(f"{name:<24}{time_imports(imports, args.runs):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
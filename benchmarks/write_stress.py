@@ -0,0 +1,259 @@
+# benchmarks/write_stress.py
+"""Concurrent feedback submissions against a scratch CSV, then an integrity check.
+
+Every writer builds rows with storage.new_feedback_record and saves them with
+storage.append_feedback, the same calls pages/interact.py makes on submit.
+Writers are threads (one Streamlit server) and optionally several processes
+(several servers, workers or imports sharing the file).
+
+    python benchmarks/write_stress.py --writers 16 --submissions 100
+    python benchmarks/write_stress.py --processes 4 --writers 8 --seed-rows 100000
+
+Afterwards the CSV must have exactly one header, every row must parse with
+valid fields (nothing interleaved), every submission must be present exactly
+once, and every write-time index must match the final file. The exit status
+is 1 when a check fails or throughput is below --min-rows-per-sec, so the
+script can gate changes to the write path. engagement_data.csv is never touched.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from storage import APP_TYPES, THEME_NAMES, FEEDBACK_COLUMNS, append_feedback, new_feedback_record  # noqa: E402
+from profiling import summary, reset  # noqa: E402
+from rollups import ROLLUPS  # noqa: E402
+from color_index import COLOR_INDEX  # noqa: E402
+from color_stats import COLOR_STATS  # noqa: E402
+from distinct_users import USER_SKETCHES  # noqa: E402
+from comment_index import COMMENT_INDEX  # noqa: E402
+from recommender import ENGAGEMENT_STATS  # noqa: E402
+
+SIDECARS = [ROLLUPS, COLOR_INDEX, COLOR_STATS, USER_SKETCHES, COMMENT_INDEX, ENGAGEMENT_STATS]
+
+HEX_COLOR = re.compile(r"#[0-9a-fA-F]{6}")
+UUID = re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}")
+DATE = re.compile(r"\d{4}-\d{2}-\d{2}")
+SECTION_COLUMNS = ["dominant_color", "landing_color", "header_color", "button_color", "background_color", "text_color"]
+
+
+# -------------------- WRITERS --------------------
+def random_color(rng):
+    return f"#{rng.randrange(1 << 24):06x}"
+
+
+def submit_form(path, rng, tag):
+    """Fill in the feedback form with random answers and submit it; returns the new user_id."""
+    preferred = [random_color(rng) if rng.random() < 0.8 else "" for _ in range(5)]
+    preferred[0] = preferred[0] or random_color(rng)  # the page refuses submissions without a color
+    record = new_feedback_record(
+        rng.choice(APP_TYPES), rng.choice(THEME_NAMES), preferred, random_color(rng),
+        rng.randint(1, 5), rng.randint(0, 100), f'stress {tag}, "quoted"\nand multi-line',
+        *(random_color(rng) for _ in range(5)),
+    )
+    append_feedback(record, path)
+    return record["user_id"]
+
+
+def run_writers(path, writers, submissions, process_index=0):
+    """Run ``writers`` threads submitting ``submissions`` forms each; returns timings and user ids."""
+    start_gate = threading.Barrier(writers)
+    user_ids, latencies, errors = [], [], []
+    lock = threading.Lock()
+
+    def writer(index):
+        rng = random.Random(f"{process_index}:{index}")
+        ids, times = [], []
+        start_gate.wait()
+        for seq in range(submissions):
+            started = time.perf_counter()
+            try:
+                ids.append(submit_form(path, rng, f"p{process_index} w{index} #{seq}"))
+            except Exception as e:
+                with lock:
+                    errors.append(repr(e))
+            times.append(time.perf_counter() - started)
+        with lock:
+            user_ids.extend(ids)
+            latencies.extend(times)
+
+    reset()
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(writers)]
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return {
+        "start": started, "end": time.time(), "user_ids": user_ids, "latencies": latencies, "errors": errors,
+        "rebuilds": index_rebuilds(),
+    }
+
+
+# -------------------- VERIFICATION --------------------
+def verify(path, expected_rows, submitted_ids):
+    """List of integrity problems in ``path`` (empty when everything checks out)."""
+    problems = []
+    headers, malformed, rows = [], 0, 0
+    seen = Counter()
+    with open(path, newline="", encoding="utf-8") as f:
+        for line_no, row in enumerate(csv.reader(f)):
+            if row == FEEDBACK_COLUMNS:
+                headers.append(line_no)
+                continue
+            rows += 1
+            if len(row) != len(FEEDBACK_COLUMNS):
+                malformed += 1
+                continue
+            values = dict(zip(FEEDBACK_COLUMNS, row))
+            colors = [c.strip() for c in values["preferred_colors"].split(",")]
+            valid = (
+                UUID.fullmatch(values["user_id"])
+                and values["app_type"] in APP_TYPES
+                and values["theme_name"] in THEME_NAMES
+                and values["rating"] in {"1", "2", "3", "4", "5"}
+                and values["engagement_score"].isdigit() and 0 <= int(values["engagement_score"]) <= 100
+                and all(HEX_COLOR.fullmatch(c) for c in colors)
+                and all(HEX_COLOR.fullmatch(values[c]) for c in SECTION_COLUMNS)
+                and DATE.fullmatch(values["date"])
+            )
+            if not valid:
+                malformed += 1
+            seen[values["user_id"]] += 1
+
+    if headers != [0]:
+        problems.append(f"expected one header on the first line, found header lines {headers[:10]}")
+    if malformed:
+        problems.append(f"{malformed} malformed or interleaved rows")
+    if rows != expected_rows:
+        problems.append(f"expected {expected_rows} data rows, found {rows}")
+    lost = [uid for uid in submitted_ids if seen[uid] == 0]
+    duplicated = [uid for uid in submitted_ids if seen[uid] > 1]
+    if lost:
+        problems.append(f"{len(lost)} submissions lost, e.g. {lost[:3]}")
+    if duplicated:
+        problems.append(f"{len(duplicated)} submissions written more than once, e.g. {duplicated[:3]}")
+
+    # Write-time indexes must have followed every append (rebuilds are counted by the writers)
+    for sidecar in SIDECARS:
+        sidecar.load(path)
+    counted = int(sum(sums[0] for sums in ROLLUPS.load(path).values()))
+    if counted != rows:
+        problems.append(f"rollups count {counted} rows, file has {rows}")
+    indexed = COMMENT_INDEX.load(path)["rows"]
+    if indexed != rows:
+        problems.append(f"comment index covers {indexed} rows, file has {rows}")
+    scored = int(sum(sums[0] for entry in ENGAGEMENT_STATS.load(path).values() for sums in entry["themes"].values()))
+    if scored != rows:
+        problems.append(f"engagement stats count {scored} rows, file has {rows}")
+    return problems
+
+
+def index_rebuilds():
+    """Full sidecar rebuilds recorded by this process since the last profiling reset."""
+    return sum(row["calls"] for row in summary() if row["section"].startswith("sidecar.") and row["section"].endswith(".rebuild"))
+
+
+# -------------------- DRIVER --------------------
+def percentile_ms(values, q):
+    return float(np.percentile(values, q) * 1000) if values else float("nan")
+
+
+def prepare(path, seed_rows):
+    """Start from ``seed_rows`` synthetic rows (or an empty file) with warm indexes."""
+    from benchmarks.generate_feedback import generate
+
+    if seed_rows:
+        generate(seed_rows, path)
+    for sidecar in SIDECARS:
+        sidecar.load(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--writers", type=int, default=16, help="concurrent writer threads per process")
+    parser.add_argument("--processes", type=int, default=1, help="writer processes sharing the file")
+    parser.add_argument("--submissions", type=int, default=50, help="form submissions per writer")
+    parser.add_argument("--seed-rows", type=int, default=0, help="synthetic history to start from")
+    parser.add_argument("--min-rows-per-sec", type=float, default=0.0, help="fail below this throughput")
+    parser.add_argument("--keep", action="store_true", help="keep the scratch directory for inspection")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix="write_stress_")
+    path = os.path.join(scratch, "engagement_data.csv")
+    try:
+        prepare(path, args.seed_rows)
+        if args.processes == 1:
+            runs = [run_writers(path, args.writers, args.submissions)]
+        else:
+            with ProcessPoolExecutor(args.processes, mp_context=get_context("spawn")) as pool:
+                futures = [pool.submit(run_writers, path, args.writers, args.submissions, i) for i in range(args.processes)]
+                runs = [future.result() for future in futures]
+
+        elapsed = max(run["end"] for run in runs) - min(run["start"] for run in runs)
+        latencies = [t for run in runs for t in run["latencies"]]
+        submitted = [uid for run in runs for uid in run["user_ids"]]
+        errors = [e for run in runs for e in run["errors"]]
+        rows_per_sec = len(submitted) / elapsed if elapsed else float("inf")
+
+        problems = [f"{len(errors)} submissions raised, e.g. {errors[:3]}"] if errors else []
+        rebuilds = sum(run["rebuilds"] for run in runs)
+        if rebuilds:
+            problems.append(f"write-time indexes were rebuilt {rebuilds} times instead of updated")
+        reset()
+        problems += verify(path, args.seed_rows + len(submitted), submitted)
+        if index_rebuilds():
+            problems.append("write-time indexes were stale after the run and had to be rebuilt")
+        if rows_per_sec < args.min_rows_per_sec:
+            problems.append(f"throughput {rows_per_sec:.1f} rows/s is below {args.min_rows_per_sec}")
+
+        result = {
+            "writers": args.writers * args.processes,
+            "processes": args.processes,
+            "seed_rows": args.seed_rows,
+            "submitted": len(submitted),
+            "seconds": elapsed,
+            "rows_per_sec": rows_per_sec,
+            "p50_ms": percentile_ms(latencies, 50),
+            "p95_ms": percentile_ms(latencies, 95),
+            "p99_ms": percentile_ms(latencies, 99),
+            "max_ms": max(latencies, default=0.0) * 1000,
+            "problems": problems,
+        }
+        print(f"{result['submitted']:,} submissions from {result['writers']} writers "
+              f"({args.processes} process(es)) on {args.seed_rows:,} existing rows")
+        print(f"  {rows_per_sec:,.1f} rows/s over {elapsed:.2f}s")
+        print(f"  latency p50 {result['p50_ms']:.1f} ms, p95 {result['p95_ms']:.1f} ms, "
+              f"p99 {result['p99_ms']:.1f} ms, max {result['max_ms']:.1f} ms")
+        print("  integrity: " + ("OK" if not problems else "FAILED"))
+        for problem in problems:
+            print(f"    - {problem}")
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(result, f, indent=2)
+    finally:
+        if args.keep:
+            print(f"  scratch files kept in {scratch}")
+        else:
+            shutil.rmtree(scratch, ignore_errors=True)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+# bulk_import.py
+"""Bulk import of field-study feedback exports.
+
+Reads CSV, JSON or JSON Lines exports (optionally gzipped) in chunks,
+validates every row with vectorised checks, drops user_ids that were
+already imported or repeat within the export, and appends the rest through
+storage.append_feedback_batch so the write-time indexes stay current.
+Rejected rows go to a CSV report with one line per row and its reasons.
+
+    python bulk_import.py field_study.csv
+    python bulk_import.py export.jsonl.gz --rejects rejects.csv --dry-run
+"""
+import argparse
+import os
+import time
+from collections import Counter
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from color_utils import NO_COLOR, pack_hex_colors, unpack_hex_colors
+from storage import (
+    DATA_PATH, FEEDBACK_COLUMNS, COLOR_COLUMNS, MAX_PREFERRED_COLORS, APP_TYPES, THEME_NAMES,
+    append_feedback_batch, exclusive, pack_user_ids, source_size,
+)
+from profiling import timed
+
+IMPORT_CHUNK_ROWS = 250_000
+REQUIRED_COLUMNS = [column for column in FEEDBACK_COLUMNS if column != "comments"]
+REJECT_COLUMNS = ["source_row", "user_id", "reasons"]
+
+
+# -------------------- READING --------------------
+def _format(source):
+    name = source.lower().removesuffix(".gz").removesuffix(".bz2").removesuffix(".zip").removesuffix(".xz")
+    if name.endswith((".jsonl", ".ndjson")):
+        return "jsonl"
+    if name.endswith(".json"):
+        return "json"
+    return "csv"
+
+
+def read_export(source, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Yield the export in chunks of text columns named like FEEDBACK_COLUMNS.
+
+    CSV and JSON Lines are streamed; a plain JSON array has to be parsed in
+    one go and is then sliced. Raises ValueError if required columns are missing.
+    """
+    kind = _format(source)
+    if kind == "csv":
+        chunks = pd.read_csv(source, dtype=str, keep_default_na=False, chunksize=chunk_rows)
+    elif kind == "jsonl":
+        chunks = pd.read_json(source, lines=True, dtype=False, chunksize=chunk_rows)
+    else:
+        records = pd.read_json(source, orient="records", dtype=False)
+        chunks = (records.iloc[i:i + chunk_rows] for i in range(0, len(records), chunk_rows))
+
+    for chunk in chunks:
+        chunk.columns = chunk.columns.astype(str).str.strip().str.lower()
+        missing = [column for column in REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ValueError(f"{source} is missing columns: {', '.join(missing)}")
+        if "comments" not in chunk.columns:
+            chunk["comments"] = ""
+        # JSON values arrive as numbers and nulls; validate everything as stripped text
+        yield pd.DataFrame(
+            {column: chunk[column].fillna("").astype(str).str.strip() for column in FEEDBACK_COLUMNS},
+        ).reset_index(drop=True)
+
+
+# -------------------- VALIDATION --------------------
+def _whole_numbers(text, low, high):
+    values = pd.to_numeric(text, errors="coerce").to_numpy(dtype=float)
+    ok = ~np.isnan(values) & (values == np.floor(values)) & (values >= low) & (values <= high)
+    return np.where(ok, values, 0).astype(int), ok
+
+
+@timed("import.validate")
+def validate_chunk(chunk, today=None):
+    """Normalise one chunk; returns ``(rows, reasons)``.
+
+    ``rows`` holds the chunk in the CSV schema with canonical values
+    (lowercase '#rrggbb', integer rating and score, ISO dates); ``reasons``
+    is an object array with '' for valid rows and '; '-joined problems otherwise.
+    """
+    n = len(chunk)
+    today = pd.Timestamp(today or datetime.now().date())
+    reasons = np.full(n, "", dtype=object)
+
+    def flag(bad, reason):
+        reasons[bad] = reasons[bad] + reason + "; "
+
+    rows = pd.DataFrame(index=chunk.index)
+    rows["user_id"] = chunk["user_id"]
+    flag((chunk["user_id"] == "").to_numpy(), "missing user_id")
+
+    rows["app_type"] = chunk["app_type"]
+    flag(~chunk["app_type"].isin(APP_TYPES).to_numpy(), "unknown app_type")
+    rows["theme_name"] = chunk["theme_name"]
+    flag(~chunk["theme_name"].isin(THEME_NAMES).to_numpy(), "unknown theme_name")
+
+    # Preferred colors: one to MAX_PREFERRED_COLORS hex codes separated by commas
+    empty = (chunk["preferred_colors"] == "").to_numpy()
+    flag(empty, "no preferred colors")
+    parts = chunk["preferred_colors"].str.split(",", expand=True)
+    flag(parts.notna().sum(axis=1).to_numpy() > MAX_PREFERRED_COLORS, f"more than {MAX_PREFERRED_COLORS} preferred colors")
+    joined = np.full(n, "", dtype=object)
+    bad_preferred = np.zeros(n, dtype=bool)
+    for i in range(min(parts.shape[1], MAX_PREFERRED_COLORS)):
+        present = parts[i].notna().to_numpy() & ~empty
+        packed = pack_hex_colors(parts[i].fillna(""))
+        valid = present & (packed != NO_COLOR)
+        bad_preferred |= present & ~valid
+        hexes = unpack_hex_colors(packed)
+        joined[valid] = joined[valid] + (", " if i else "") + hexes[valid]
+    flag(bad_preferred, "invalid preferred color")
+    rows["preferred_colors"] = joined
+
+    for column in FEEDBACK_COLUMNS:
+        if column in COLOR_COLUMNS:
+            packed = pack_hex_colors(chunk[column])
+            flag(packed == NO_COLOR, f"invalid {column}")
+            rows[column] = unpack_hex_colors(packed)
+
+    rows["rating"], ok = _whole_numbers(chunk["rating"], 1, 5)
+    flag(~ok, "rating not a whole number 1-5")
+    rows["engagement_score"], ok = _whole_numbers(chunk["engagement_score"], 0, 100)
+    flag(~ok, "engagement_score not a whole number 0-100")
+    rows["comments"] = chunk["comments"]
+
+    dates = pd.to_datetime(chunk["date"], format="ISO8601", errors="coerce")
+    flag(dates.isna().to_numpy(), "invalid date")
+    flag((dates.dt.normalize() > today).to_numpy(), "date in the future")
+    rows["date"] = dates.dt.strftime("%Y-%m-%d")
+
+    return rows[FEEDBACK_COLUMNS], np.char.rstrip(reasons.astype(str), "; ").astype(object)
+
+
+# -------------------- DEDUPLICATION --------------------
+def user_id_keys(user_ids):
+    """16-byte keys for user ids (UUIDs compare case-insensitively, other ids by hash)."""
+    return np.ascontiguousarray(pack_user_ids(user_ids).astype(">u8")).view("S16").ravel()
+
+
+class SeenUserIds:
+    """Sorted array of user id keys with vectorised membership tests and inserts."""
+
+    def __init__(self, keys=None):
+        self.keys = np.unique(keys) if keys is not None else np.empty(0, dtype="S16")
+
+    def contains(self, keys):
+        if not len(self.keys):
+            return np.zeros(len(keys), dtype=bool)
+        positions = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return self.keys[positions] == keys
+
+    def add(self, keys):
+        self.keys = np.union1d(self.keys, keys)
+
+
+def existing_user_ids(path=DATA_PATH, chunk_rows=IMPORT_CHUNK_ROWS):
+    """Keys of every user_id already in the feedback CSV."""
+    if source_size(path) == 0:
+        return SeenUserIds()
+    keys = [
+        user_id_keys(chunk.iloc[:, 0])
+        for chunk in pd.read_csv(
+            path, usecols=lambda c: c.strip() == "user_id", dtype=str, keep_default_na=False, chunksize=chunk_rows,
+        )
+    ]
+    return SeenUserIds(np.concatenate(keys) if keys else None)
+
+
+# -------------------- IMPORT --------------------
+def _write_rejects(rejects_path, frame, first):
+    if rejects_path is not None and len(frame):
+        frame[REJECT_COLUMNS].to_csv(rejects_path, mode="w" if first else "a", header=first, index=False)
+
+
+def import_feedback(source, path=DATA_PATH, rejects_path=None, chunk_rows=IMPORT_CHUNK_ROWS, dry_run=False):
+    """Validate ``source`` and append its new rows to ``path``; returns a summary dict.
+
+    ``source_row`` in the rejects report is the 1-based record number in the
+    export (quoted CSV fields may span lines, so it is not a line number).
+    """
+    start = time.perf_counter()
+    summary = {"read": 0, "imported": 0, "rejected": 0, "reasons": Counter()}
+    first_reject = True
+    if rejects_path is not None and os.path.exists(rejects_path):
+        os.remove(rejects_path)
+
+    # Hold the write lock for the whole import so no submission can slip in a duplicate user_id
+    with exclusive(path):
+        with timed("import.existing_user_ids"):
+            existing = existing_user_ids(path, chunk_rows)
+        imported = SeenUserIds()
+        for chunk in read_export(source, chunk_rows):
+            rows, reasons = validate_chunk(chunk)
+            source_row = np.arange(summary["read"], summary["read"] + len(chunk)) + 1
+            summary["read"] += len(chunk)
+
+            keys = user_id_keys(rows["user_id"])
+            valid = reasons == ""
+            known = valid & existing.contains(keys)
+            reasons[known] = "user_id already in the feedback history"
+            repeated = valid & ~known
+            repeated[repeated] = imported.contains(keys[repeated]) | pd.Series(keys[repeated]).duplicated().to_numpy()
+            reasons[repeated] = "duplicate user_id within the export"
+            accepted = reasons == ""
+
+            rejected = pd.DataFrame({"source_row": source_row, "user_id": chunk["user_id"], "reasons": reasons})[~accepted]
+            _write_rejects(rejects_path, rejected, first_reject)
+            first_reject = first_reject and rejected.empty
+            for row_reasons in rejected["reasons"]:
+                summary["reasons"].update(row_reasons.split("; "))
+            summary["rejected"] += len(rejected)
+
+            batch = rows[accepted].reset_index(drop=True)
+            if len(batch):
+                imported.add(keys[accepted])
+                if not dry_run:
+                    with timed("import.append"):
+                        append_feedback_batch(batch, path)
+                summary["imported"] += len(batch)
+
+    summary["seconds"] = time.perf_counter() - start
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a CSV/JSON feedback export into the feedback history.")
+    parser.add_argument("source", help="export file (.csv, .json, .jsonl / .ndjson, optionally compressed)")
+    parser.add_argument("--data", default=DATA_PATH, help="feedback CSV to append to")
+    parser.add_argument("--rejects", help="where to write rejected rows (default: <source>.rejects.csv)")
+    parser.add_argument("--chunk-rows", type=int, default=IMPORT_CHUNK_ROWS)
+    parser.add_argument("--dry-run", action="store_true", help="validate and report without writing")
+    args = parser.parse_args()
+
+    rejects_path = args.rejects or f"{args.source}.rejects.csv"
+    summary = import_feedback(args.source, args.data, rejects_path, args.chunk_rows, args.dry_run)
+    verb = "Would import" if args.dry_run else "Imported"
+    rate = summary["read"] / summary["seconds"] if summary["seconds"] else 0
+    print(f"{verb} {summary['imported']:,} of {summary['read']:,} rows in {summary['seconds']:.1f}s ({rate:,.0f} rows/s)")
+    if summary["rejected"]:
+        print(f"Rejected {summary['rejected']:,} rows; details in {rejects_path}")
+        for reason, count in summary["reasons"].most_common():
+            print(f"  {count:>10,}  {reason}")
+
+
+if __name__ == "__main__":
+    main()
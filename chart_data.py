@@ -0,0 +1,89 @@
+# chart_data.py
+import math
+import pandas as pd
+import plotly.graph_objects as go
+from storage import PREFERRED_COLUMNS, expand_compact_feedback
+
+# Compact columns to sort by for each column shown in the raw table
+SORT_KEYS = {
+    "user_id": ["user_id_hi", "user_id_lo"],
+    "preferred_colors": PREFERRED_COLUMNS,
+}
+
+
+# -------------------- BOX PLOTS --------------------
+def box_stats(df, by, value):
+    """Per-group five-number summary plus Tukey fences, computed on the server.
+
+    Only one row per group leaves this function, so the chart payload does not
+    grow with the number of feedback rows.
+    """
+    grouped = df.groupby(by, observed=True)[value]
+    stats = grouped.quantile([0.25, 0.5, 0.75]).unstack()
+    stats.columns = ["q1", "median", "q3"]
+    stats["min"] = grouped.min()
+    stats["max"] = grouped.max()
+    stats["mean"] = grouped.mean()
+    stats["count"] = grouped.count()
+
+    iqr = stats["q3"] - stats["q1"]
+    low, high = stats["q1"] - 1.5 * iqr, stats["q3"] + 1.5 * iqr
+    # Fences sit on the most extreme data point still inside 1.5 × IQR
+    values = df[[by, value]].assign(_low=df[by].map(low), _high=df[by].map(high))
+    inside = values[(values[value] >= values["_low"]) & (values[value] <= values["_high"])]
+    inside_grouped = inside.groupby(by, observed=True)[value]
+    stats["lowerfence"] = inside_grouped.min()
+    stats["upperfence"] = inside_grouped.max()
+    return stats.reset_index()
+
+
+def box_figure(stats, by, title, value_label, template="plotly_dark"):
+    """Build a box chart from precomputed box_stats, one colored trace per group."""
+    fig = go.Figure()
+    for row in stats.itertuples(index=False):
+        name = str(getattr(row, by))
+        fig.add_trace(go.Box(
+            name=name,
+            x=[name],
+            q1=[row.q1],
+            median=[row.median],
+            q3=[row.q3],
+            lowerfence=[row.lowerfence],
+            upperfence=[row.upperfence],
+            mean=[row.mean],
+            hovertext=[f"n = {row.count}"],
+        ))
+    fig.update_layout(
+        title=title,
+        template=template,
+        xaxis_title=by,
+        yaxis_title=value_label,
+        legend_title_text=by,
+    )
+    return fig
+
+
+# -------------------- PAGINATED TABLE --------------------
+def page_count(n_rows, page_size):
+    return max(1, math.ceil(n_rows / page_size))
+
+
+def table_page(df, sort_by, ascending, page, page_size):
+    """Sort the compact frame on the server and expand only the requested page.
+
+    Pages are 1-based. When the page lies near the top of the ordering a
+    partial selection (nsmallest/nlargest) is used instead of a full sort.
+    """
+    keys = SORT_KEYS.get(sort_by, [sort_by])
+    start = (page - 1) * page_size
+    stop = start + page_size
+
+    numeric = all(pd.api.types.is_numeric_dtype(df[k]) for k in keys)
+    ordered = None
+    if numeric and stop * 10 <= len(df):
+        pick = df.nsmallest if ascending else df.nlargest
+        ordered = pick(stop, keys, keep="first")
+    # nsmallest/nlargest drop missing scores, which a full sort places last
+    if ordered is None or len(ordered) < stop:
+        ordered = df.sort_values(keys, ascending=ascending, kind="stable")
+    return expand_compact_feedback(ordered.iloc[start:stop])
@@ -0,0 +1,94 @@
+# color_extraction.py
+import io
+import hashlib
+import threading
+from collections import OrderedDict
+from PIL import Image
+import numpy as np
+from image_dedup import SCREENSHOT_INDEX, perceptual_hash
+from profiling import timed
+
+
+# -------------------- COLOR EXTRACTION --------------------
+@timed("extraction.decode_image")
+def decode_image(image_file):
+    """Decode an upload once into 150×150 RGB pixels for clustering plus its perceptual hash."""
+    image = Image.open(image_file)
+    fingerprint = perceptual_hash(image)
+    image = image.resize((150, 150))  # Reduce size for speed
+    img_np = np.array(image)
+
+    # Remove transparency if it exists
+    if img_np.shape[-1] == 4:
+        img_np = img_np[:, :, :3]
+
+    return img_np.reshape((-1, 3)), fingerprint
+
+
+@timed("extraction.extract_palette")
+def extract_palette(image_file, k=5):
+    """Extract k dominant colors and the share of pixels in each cluster.
+
+    Screenshots whose perceptual hash is within a few bits of an earlier upload
+    (same screen, different clock or badge) reuse that upload's palette.
+    """
+    img_np, fingerprint = decode_image(image_file)
+    cached = SCREENSHOT_INDEX.find(fingerprint, ("palette", k))
+    if cached is not None:
+        return cached
+
+    from sklearn.cluster import KMeans  # deferred: importing scikit-learn takes about a second
+
+    kmeans = KMeans(n_clusters=k)
+    with timed("extraction.kmeans"):
+        kmeans.fit(img_np)
+
+    dominant_colors = kmeans.cluster_centers_.astype(int)
+    weights = np.bincount(kmeans.labels_, minlength=k) / len(kmeans.labels_)
+    SCREENSHOT_INDEX.add(fingerprint, ("palette", k), (dominant_colors, weights))
+    return dominant_colors, weights
+
+
+@timed("extraction.extract_coarse_palette")
+def extract_coarse_palette(image_file, k=5, size=32):
+    """Fast preview palette: median-cut quantization of a tiny thumbnail (a few milliseconds)."""
+    image = Image.open(image_file)
+    image.draft("RGB", (size * 4, size * 4))  # JPEG: decode at reduced scale
+    small = image.convert("RGB").resize((size, size), Image.Resampling.BOX)
+    quantized = small.quantize(colors=k, method=Image.Quantize.MEDIANCUT)
+
+    counts = np.bincount(np.asarray(quantized).ravel(), minlength=k)[:k]
+    palette = np.array(quantized.getpalette()[:3 * k]).reshape(-1, 3)
+    present = counts > 0
+    return palette[present], counts[present] / counts.sum()
+
+
+def extract_dominant_colors(image_file, k=5):
+    """Extract k dominant colors from an image using KMeans clustering."""
+    return extract_palette(image_file, k)[0]
+
+
+# -------------------- EXTRACTION CACHE --------------------
+EXTRACTION_CACHE_SIZE = 128
+_extraction_cache = OrderedDict()
+_extraction_lock = threading.Lock()
+
+
+def extract_palette_cached(image_bytes, k=5):
+    """extract_palette keyed by a hash of the uploaded bytes, so re-uploads and reruns are free.
+
+    Safe to call from worker threads.
+    """
+    key = (hashlib.sha256(image_bytes).hexdigest(), k)
+    with _extraction_lock:
+        if key in _extraction_cache:
+            _extraction_cache.move_to_end(key)
+            return _extraction_cache[key]
+
+    result = extract_palette(io.BytesIO(image_bytes), k)
+
+    with _extraction_lock:
+        _extraction_cache[key] = result
+        while len(_extraction_cache) > EXTRACTION_CACHE_SIZE:
+            _extraction_cache.popitem(last=False)
+    return result
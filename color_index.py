@@ -0,0 +1,125 @@
+# color_index.py
+import heapq
+from collections import Counter
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, Sidecar, pack_preferred_colors
+from color_utils import NO_COLOR, packed_to_rgb, rgb_to_lab, delta_e, unpack_hex_colors
+
+# A top-n leaderboard only lets the n × this most mentioned colors lead near-identical groups
+GROUPING_CANDIDATE_FACTOR = 50
+GROUPING_TAIL_NEIGHBOURS = 4
+
+
+# -------------------- WRITE PATH --------------------
+def _empty():
+    return {}
+
+
+def _update(state, batch):
+    """Count preferred colors per day × app_type × theme for a batch of rows."""
+    packed = pack_preferred_colors(batch["preferred_colors"])
+    days = pd.to_datetime(batch["date"]).dt.strftime("%Y-%m-%d").to_numpy()
+    apps = batch["app_type"].astype(str).to_numpy()
+    themes = batch["theme_name"].astype(str).to_numpy()
+
+    frame = pd.DataFrame({
+        "date": np.repeat(days, packed.shape[1]),
+        "app_type": np.repeat(apps, packed.shape[1]),
+        "theme_name": np.repeat(themes, packed.shape[1]),
+        "color": packed.ravel(),
+    })
+    frame = frame[frame["color"] != NO_COLOR]
+    counts = frame.groupby(["date", "app_type", "theme_name", "color"], sort=False).size().reset_index()
+    columns = [counts[column].tolist() for column in counts.columns]
+    changed = {}  # copies of the touched counters; published ones are read without the lock
+    for day, app, theme, color, count in zip(*columns):
+        counter = changed.get((day, app, theme))
+        if counter is None:
+            counter = changed[(day, app, theme)] = Counter(state.get((day, app, theme), ()))
+        counter[color] += count
+    state.update(changed)
+    return state
+
+
+COLOR_INDEX = Sidecar("color_frequency", _empty, _update)
+
+
+# -------------------- READ PATH --------------------
+def color_counts(app_types, themes, start, end, path=DATA_PATH):
+    """Merge the per-partition counters that match the dashboard filters."""
+    app_types, themes = set(app_types), set(themes)
+    start, end = pd.to_datetime(start).strftime("%Y-%m-%d"), pd.to_datetime(end).strftime("%Y-%m-%d")
+    merged = Counter()
+    for (day, app, theme), counter in COLOR_INDEX.load(path).items():
+        if app in app_types and theme in themes and start <= day <= end:
+            merged.update(counter)
+    return merged
+
+
+def group_similar_colors(counts, max_delta_e=5.0, limit=None):
+    """Fold each color into a more popular one within ``max_delta_e`` (CIEDE2000).
+
+    Colors are visited from most to least frequent; each either starts a new
+    group or joins the nearest existing group leader, so the leader (the most
+    popular member) is what gets reported. With ``limit`` only the ``limit``
+    most frequent colors are visited that way; every other color joins its
+    nearest leader in Lab space if that one is within ``max_delta_e`` and
+    otherwise keeps its own count, so long-tailed histories stay cheap.
+    """
+    if not counts:
+        return Counter()
+    colors = np.fromiter(counts.keys(), dtype=np.uint32, count=len(counts))
+    values = np.fromiter(counts.values(), dtype=np.int64, count=len(counts))
+    order = np.lexsort((colors, -values))
+    head, tail = (order, order[:0]) if limit is None else (order[:limit], order[limit:])
+    labs = rgb_to_lab(packed_to_rgb(colors).astype(float))
+
+    group = np.arange(len(colors))  # position of each color's group leader
+    leaders, leader_labs = [], np.empty((len(head), 3))
+    for i in head:
+        if leaders:
+            distances = delta_e(leader_labs[:len(leaders)], labs[i])
+            nearest = int(distances.argmin())
+            if distances[nearest] <= max_delta_e:
+                group[i] = leaders[nearest]
+                continue
+        leader_labs[len(leaders)] = labs[i]
+        leaders.append(i)
+
+    if len(tail):
+        from sklearn.neighbors import KDTree  # deferred so the dashboard loads without scikit-learn
+
+        # CIEDE2000 and Euclidean Lab distance disagree a little, so re-rank a few Lab neighbours
+        k = min(GROUPING_TAIL_NEIGHBOURS, len(leaders))
+        _, neighbours = KDTree(leader_labs[:len(leaders)]).query(labs[tail], k=k)
+        neighbours = np.asarray(leaders)[neighbours]
+        distances = np.stack([delta_e(labs[tail], labs[neighbours[:, j]]) for j in range(k)], axis=1)
+        best = distances.argmin(axis=1)
+        close = distances[np.arange(len(tail)), best] <= max_delta_e
+        group[tail[close]] = neighbours[close, best[close]]
+
+    totals = np.bincount(group, weights=values, minlength=len(colors)).astype(np.int64)
+    kept = np.flatnonzero(totals)
+    return Counter(dict(zip(colors[kept].tolist(), totals[kept].tolist())))
+
+
+def top_preferred_colors(app_types, themes, start, end, n=10, max_delta_e=None, path=DATA_PATH):
+    """Top-N preferred colors for a filter combination.
+
+    Returns a frame with ``color`` (hex), ``count`` and ``share`` of all color
+    mentions. Pass ``max_delta_e`` to bucket near-identical hex values together.
+    """
+    counts = color_counts(app_types, themes, start, end, path)
+    if max_delta_e is not None:
+        counts = group_similar_colors(counts, max_delta_e, limit=n * GROUPING_CANDIDATE_FACTOR)
+    total = sum(counts.values())
+    top = heapq.nsmallest(n, counts.items(), key=lambda kv: (-kv[1], kv[0]))
+    if not top:
+        return pd.DataFrame(columns=["color", "count", "share"])
+    colors, values = zip(*top)
+    return pd.DataFrame({
+        "color": unpack_hex_colors(np.array(colors, dtype=np.uint32)),
+        "count": values,
+        "share": np.array(values) / total,
+    })
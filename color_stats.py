@@ -0,0 +1,163 @@
+# color_stats.py
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, Sidecar
+from color_utils import hex_to_rgb, rgb_to_hsl, contrast_ratio
+from contrast import WCAG_AA_TEXT
+
+FEATURES = [
+    "dominant_hue_sin", "dominant_hue_cos", "dominant_saturation", "dominant_lightness",
+    "background_lightness", "text_contrast",
+]
+FEATURE_LABELS = {
+    "dominant_hue_sin": "Dominant hue (sin)",
+    "dominant_hue_cos": "Dominant hue (cos)",
+    "dominant_saturation": "Dominant saturation",
+    "dominant_lightness": "Dominant lightness",
+    "background_lightness": "Background lightness",
+    "text_contrast": "Text/background contrast",
+}
+TARGETS = ["rating", "engagement_score"]
+VARIABLES = FEATURES + TARGETS
+
+
+# -------------------- FEATURES --------------------
+def color_features(rows):
+    """Numeric color properties per feedback row; rows with unparsable colors are dropped."""
+    dominant = rgb_to_hsl(hex_to_rgb(rows["dominant_color"]))
+    background = hex_to_rgb(rows["background_color"])
+    text = hex_to_rgb(rows["text_color"])
+    hue = np.radians(dominant[:, 0])
+
+    frame = pd.DataFrame({
+        "dominant_hue_sin": np.sin(hue),
+        "dominant_hue_cos": np.cos(hue),
+        "dominant_saturation": dominant[:, 1],
+        "dominant_lightness": dominant[:, 2],
+        "background_lightness": rgb_to_hsl(background)[:, 2],
+        "text_contrast": contrast_ratio(text, background),
+        "rating": pd.to_numeric(rows["rating"], errors="coerce").to_numpy(dtype=float),
+        "engagement_score": pd.to_numeric(rows["engagement_score"], errors="coerce").to_numpy(dtype=float),
+    }, index=rows.index)
+    return frame.dropna()
+
+
+# -------------------- ONLINE MOMENTS --------------------
+def batch_moments(values):
+    """Count, mean vector and co-moment matrix (sum of outer products of deviations)."""
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    if n == 0:
+        return 0, np.zeros(values.shape[1]), np.zeros((values.shape[1], values.shape[1]))
+    mean = values.mean(axis=0)
+    centered = values - mean
+    return n, mean, centered.T @ centered
+
+
+def merge_moments(a, b):
+    """Combine two moment triples (Chan et al. parallel form of Welford's update)."""
+    n_a, mean_a, m2_a = a
+    n_b, mean_b, m2_b = b
+    if n_a == 0:
+        return b
+    if n_b == 0:
+        return a
+    n = n_a + n_b
+    delta = mean_b - mean_a
+    mean = mean_a + delta * n_b / n
+    m2 = m2_a + m2_b + np.outer(delta, delta) * n_a * n_b / n
+    return n, mean, m2
+
+
+def _empty_moments():
+    return batch_moments(np.empty((0, len(VARIABLES))))
+
+
+# -------------------- WRITE PATH --------------------
+def _empty():
+    return {}
+
+
+def _update(state, batch):
+    """Fold a batch into per day × app_type × theme × WCAG-AA moments."""
+    features = color_features(batch)
+    if features.empty:
+        return state
+    keys = pd.DataFrame({
+        "date": pd.to_datetime(batch.loc[features.index, "date"]).dt.strftime("%Y-%m-%d"),
+        "app_type": batch.loc[features.index, "app_type"].astype(str),
+        "theme_name": batch.loc[features.index, "theme_name"].astype(str),
+        "passes_aa": features["text_contrast"] >= WCAG_AA_TEXT,
+    })
+    values = features[VARIABLES].to_numpy()
+    for key, positions in keys.groupby(list(keys.columns), sort=False).indices.items():
+        state[key] = merge_moments(state.get(key, _empty_moments()), batch_moments(values[positions]))
+    return state
+
+
+COLOR_STATS = Sidecar("color_stats", _empty, _update)
+
+
+# -------------------- READ PATH --------------------
+def filtered_moments(app_types, themes, start, end, path=DATA_PATH):
+    """Merge partition moments matching the filters; returns (all, passes AA, fails AA)."""
+    app_types, themes = set(app_types), set(themes)
+    start, end = pd.to_datetime(start).strftime("%Y-%m-%d"), pd.to_datetime(end).strftime("%Y-%m-%d")
+    groups = {True: _empty_moments(), False: _empty_moments()}
+    for (day, app, theme, passes_aa), moments in COLOR_STATS.load(path).items():
+        if app in app_types and theme in themes and start <= day <= end:
+            groups[passes_aa] = merge_moments(groups[passes_aa], moments)
+    return merge_moments(groups[True], groups[False]), groups[True], groups[False]
+
+
+def correlations(moments):
+    """Pearson correlation of every feature with every target (NaN where undefined)."""
+    n, _, m2 = moments
+    with np.errstate(divide="ignore", invalid="ignore"):
+        std = np.sqrt(np.diag(m2))
+        corr = m2 / np.outer(std, std)
+    f, t = len(FEATURES), len(TARGETS)
+    return pd.DataFrame(corr[:f, f:f + t], index=FEATURES, columns=TARGETS)
+
+
+def regression(moments, target, ridge=1e-9):
+    """Multiple linear regression of ``target`` on all features from sufficient statistics.
+
+    Returns per-feature slopes, standardized slopes and the model R².
+    """
+    n, mean, m2 = moments
+    f = len(FEATURES)
+    y = VARIABLES.index(target)
+    if n <= f + 1:
+        return pd.DataFrame(index=FEATURES, columns=["slope", "standardized"], dtype=float), np.nan
+    sxx = m2[:f, :f] + ridge * np.eye(f)
+    sxy = m2[:f, y]
+    slopes = np.linalg.lstsq(sxx, sxy, rcond=None)[0]
+    syy = m2[y, y]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        standardized = slopes * np.sqrt(np.diag(m2[:f, :f]) / syy)
+        r2 = float(slopes @ sxy / syy)
+    return pd.DataFrame({"slope": slopes, "standardized": standardized}, index=FEATURES), r2
+
+
+def effect_sizes(passing, failing):
+    """Cohen's d of each target between rows that pass and fail WCAG AA text contrast."""
+    n_p, mean_p, m2_p = passing
+    n_f, mean_f, m2_f = failing
+    rows = []
+    for target in TARGETS:
+        i = VARIABLES.index(target)
+        if n_p + n_f > 2 and n_p and n_f:
+            pooled = np.sqrt((m2_p[i, i] + m2_f[i, i]) / (n_p + n_f - 2))
+            d = (mean_p[i] - mean_f[i]) / pooled if pooled > 0 else np.nan
+        else:
+            d = np.nan
+        rows.append({
+            "target": target,
+            "mean_passing_aa": mean_p[i] if n_p else np.nan,
+            "mean_failing_aa": mean_f[i] if n_f else np.nan,
+            "n_passing": n_p,
+            "n_failing": n_f,
+            "cohens_d": d,
+        })
+    return pd.DataFrame(rows)
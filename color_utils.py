@@ -0,0 +1,236 @@
+# color_utils.py
+import numpy as np
+import pandas as pd
+
+NO_COLOR = np.uint32(0xFFFFFFFF)  # packed colors only use the low 24 bits
+
+# D65 reference white and sRGB -> XYZ matrix (IEC 61966-2-1)
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883])
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_XYZ_TO_RGB = np.linalg.inv(_RGB_TO_XYZ)
+
+
+# -------------------- HEX PARSING --------------------
+_NIBBLE = np.full(256, 255, dtype=np.uint8)
+_NIBBLE[np.frombuffer(b"0123456789", dtype=np.uint8)] = np.arange(10)
+_NIBBLE[np.frombuffer(b"abcdef", dtype=np.uint8)] = np.arange(10, 16)
+_NIBBLE[np.frombuffer(b"ABCDEF", dtype=np.uint8)] = np.arange(10, 16)
+_HEX_BYTE = np.array([f"{i:02x}" for i in range(256)], dtype="U2")
+
+
+def hex_nibbles(values, width):
+    """Decode fixed-width hex strings into an (n, width) nibble array plus a validity mask."""
+    if not isinstance(values, np.ndarray) or values.dtype.kind != "U":
+        values = np.asarray(pd.Series(values).fillna("").to_numpy(dtype=object), dtype=f"U{width + 8}")
+    text = np.char.lstrip(np.char.strip(values), "#")
+    ok = np.char.str_len(text) == width
+    codepoints = text.astype(f"U{width}").view(np.uint32).reshape(len(text), width)
+    nibbles = _NIBBLE[np.where(codepoints < 256, codepoints, 0)]
+    ok &= (nibbles != 255).all(axis=1)
+    return nibbles, ok
+
+
+def pack_hex_colors(values):
+    """Pack '#rrggbb' strings into uint32 0x00RRGGBB; invalid or missing become NO_COLOR."""
+    nibbles, ok = hex_nibbles(values, 6)
+    weights = np.uint32(1) << np.arange(20, -1, -4, dtype=np.uint32)
+    packed = (nibbles.astype(np.uint32) * weights).sum(axis=1, dtype=np.uint32)
+    packed[~ok] = NO_COLOR
+    return packed
+
+
+def unpack_hex_colors(packed):
+    """Inverse of pack_hex_colors; NO_COLOR becomes None."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    rgb = packed_to_rgb(packed)
+    text = np.char.add(np.char.add(np.char.add("#", _HEX_BYTE[rgb[:, 0]]), _HEX_BYTE[rgb[:, 1]]), _HEX_BYTE[rgb[:, 2]])
+    out = text.astype(object)
+    out[packed == NO_COLOR] = None
+    return out
+
+
+def packed_to_rgb(packed):
+    """Split uint32 0x00RRGGBB values into an (n, 3) uint8 array."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=-1).astype(np.uint8)
+
+
+def rgb_to_packed(rgb):
+    """Pack an (n, 3) RGB array (0-255, rounded and clipped) into uint32 0x00RRGGBB."""
+    rgb = np.clip(np.rint(np.asarray(rgb, dtype=float)), 0, 255).astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
+def hex_to_rgb(values):
+    """Parse a column of hex codes into an (n, 3) float array; invalid rows are NaN."""
+    packed = pack_hex_colors(values)
+    rgb = packed_to_rgb(packed).astype(float)
+    rgb[packed == NO_COLOR] = np.nan
+    return rgb
+
+
+def rgb_to_hex(rgb):
+    """Format an (n, 3) RGB array as '#rrggbb' strings; rows containing NaN become None."""
+    rgb = np.atleast_2d(np.asarray(rgb, dtype=float))
+    packed = rgb_to_packed(np.nan_to_num(rgb))
+    packed[np.isnan(rgb).any(axis=1)] = NO_COLOR
+    return unpack_hex_colors(packed)
+
+
+# -------------------- COLOR SPACES --------------------
+def srgb_to_linear(rgb):
+    """sRGB 0-255 -> linear-light 0-1."""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    return np.where(c <= 0.04045, c / 12.92, ((c + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(linear):
+    """Linear-light 0-1 -> sRGB 0-255 (unclipped)."""
+    c = np.clip(np.asarray(linear, dtype=float), 0, None)
+    return 255.0 * np.where(c <= 0.0031308, c * 12.92, 1.055 * c ** (1 / 2.4) - 0.055)
+
+
+def rgb_to_hsl(rgb):
+    """RGB 0-255 -> HSL with hue in degrees [0, 360) and saturation/lightness in [0, 1]."""
+    c = np.asarray(rgb, dtype=float) / 255.0
+    cmax = c.max(axis=-1)
+    cmin = c.min(axis=-1)
+    delta = cmax - cmin
+    lightness = (cmax + cmin) / 2
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        saturation = np.where(delta == 0, 0.0, delta / (1 - np.abs(2 * lightness - 1)))
+        r, g, b = c[..., 0], c[..., 1], c[..., 2]
+        hue = np.select(
+            [delta == 0, cmax == r, cmax == g],
+            [0.0, ((g - b) / delta) % 6, (b - r) / delta + 2],
+            (r - g) / delta + 4,
+        )
+    return np.stack([(hue * 60) % 360, saturation, lightness], axis=-1)
+
+
+def hsl_to_rgb(hsl):
+    """HSL (hue in degrees, saturation/lightness in [0, 1]) -> RGB 0-255."""
+    hsl = np.asarray(hsl, dtype=float)
+    h, s, lightness = hsl[..., 0], hsl[..., 1], hsl[..., 2]
+    a = s * np.minimum(lightness, 1 - lightness)
+    k = (np.stack([np.zeros_like(h) + n for n in (0, 8, 4)], axis=-1) + h[..., None] / 30) % 12
+    c = lightness[..., None] - a[..., None] * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+    return c * 255.0
+
+
+def rgb_to_lab(rgb):
+    """sRGB 0-255 -> CIE L*a*b* (D65)."""
+    xyz = srgb_to_linear(rgb) @ _RGB_TO_XYZ.T / _WHITE_D65
+    f = np.where(xyz > (6 / 29) ** 3, np.cbrt(xyz), xyz / (3 * (6 / 29) ** 2) + 4 / 29)
+    return np.stack([
+        116 * f[..., 1] - 16,
+        500 * (f[..., 0] - f[..., 1]),
+        200 * (f[..., 1] - f[..., 2]),
+    ], axis=-1)
+
+
+def lab_to_rgb(lab):
+    """CIE L*a*b* (D65) -> sRGB 0-255 (unclipped)."""
+    lab = np.asarray(lab, dtype=float)
+    fy = (lab[..., 0] + 16) / 116
+    f = np.stack([fy + lab[..., 1] / 500, fy, fy - lab[..., 2] / 200], axis=-1)
+    xyz = np.where(f > 6 / 29, f ** 3, 3 * (6 / 29) ** 2 * (f - 4 / 29)) * _WHITE_D65
+    return linear_to_srgb(xyz @ _XYZ_TO_RGB.T)
+
+
+# -------------------- LUMINANCE & CONTRAST --------------------
+def relative_luminance(rgb):
+    """WCAG 2.x relative luminance of sRGB 0-255 colors, in [0, 1]."""
+    return srgb_to_linear(rgb) @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(rgb1, rgb2):
+    """WCAG contrast ratio (1-21) between two colors or two broadcastable arrays of colors."""
+    l1 = relative_luminance(rgb1)
+    l2 = relative_luminance(rgb2)
+    return (np.maximum(l1, l2) + 0.05) / (np.minimum(l1, l2) + 0.05)
+
+
+# -------------------- DISTANCE & AGGREGATION --------------------
+def delta_e(lab1, lab2, method="ciede2000"):
+    """Perceptual distance between Lab colors; inputs broadcast against each other.
+
+    ``method`` is "ciede2000" (default) or "cie76" (plain Euclidean in Lab).
+    """
+    lab1 = np.asarray(lab1, dtype=float)
+    lab2 = np.asarray(lab2, dtype=float)
+    if method == "cie76":
+        return np.sqrt(((lab1 - lab2) ** 2).sum(axis=-1))
+    if method != "ciede2000":
+        raise ValueError(f"Unknown delta E method: {method}")
+
+    L1, a1, b1 = lab1[..., 0], lab1[..., 1], lab1[..., 2]
+    L2, a2, b2 = lab2[..., 0], lab2[..., 1], lab2[..., 2]
+
+    c_bar = (np.hypot(a1, b1) + np.hypot(a2, b2)) / 2
+    g = 0.5 * (1 - np.sqrt(c_bar ** 7 / (c_bar ** 7 + 25.0 ** 7)))
+    a1p, a2p = a1 * (1 + g), a2 * (1 + g)
+    c1p, c2p = np.hypot(a1p, b1), np.hypot(a2p, b2)
+    h1p = np.degrees(np.arctan2(b1, a1p)) % 360
+    h2p = np.degrees(np.arctan2(b2, a2p)) % 360
+
+    dLp = L2 - L1
+    dCp = c2p - c1p
+    dhp = h2p - h1p
+    dhp = np.where(dhp > 180, dhp - 360, np.where(dhp < -180, dhp + 360, dhp))
+    dhp = np.where(c1p * c2p == 0, 0.0, dhp)
+    dHp = 2 * np.sqrt(c1p * c2p) * np.sin(np.radians(dhp / 2))
+
+    Lp_bar = (L1 + L2) / 2
+    Cp_bar = (c1p + c2p) / 2
+    h_sum = h1p + h2p
+    hp_bar = np.where(
+        c1p * c2p == 0, h_sum,
+        np.where(np.abs(h1p - h2p) <= 180, h_sum / 2,
+                 np.where(h_sum < 360, (h_sum + 360) / 2, (h_sum - 360) / 2)),
+    )
+
+    t = (1 - 0.17 * np.cos(np.radians(hp_bar - 30)) + 0.24 * np.cos(np.radians(2 * hp_bar))
+         + 0.32 * np.cos(np.radians(3 * hp_bar + 6)) - 0.20 * np.cos(np.radians(4 * hp_bar - 63)))
+    d_theta = 30 * np.exp(-(((hp_bar - 275) / 25) ** 2))
+    r_c = 2 * np.sqrt(Cp_bar ** 7 / (Cp_bar ** 7 + 25.0 ** 7))
+    s_l = 1 + 0.015 * (Lp_bar - 50) ** 2 / np.sqrt(20 + (Lp_bar - 50) ** 2)
+    s_c = 1 + 0.045 * Cp_bar
+    s_h = 1 + 0.015 * Cp_bar * t
+    r_t = -np.sin(np.radians(2 * d_theta)) * r_c
+
+    return np.sqrt(
+        (dLp / s_l) ** 2 + (dCp / s_c) ** 2 + (dHp / s_h) ** 2
+        + r_t * (dCp / s_c) * (dHp / s_h)
+    )
+
+
+def pairwise_delta_e(lab_a, lab_b=None, method="ciede2000"):
+    """(n, m) matrix of distances between two sets of Lab colors."""
+    lab_a = np.asarray(lab_a, dtype=float)
+    lab_b = lab_a if lab_b is None else np.asarray(lab_b, dtype=float)
+    return delta_e(lab_a[:, None, :], lab_b[None, :, :], method=method)
+
+
+def mean_color(rgb, space="lab"):
+    """Average an (n, 3) RGB array, ignoring NaN rows, and return one RGB triple.
+
+    ``space`` chooses where the averaging happens: "lab" (perceptual, default),
+    "linear" (linear-light RGB, physically correct mixing) or "srgb" (naive).
+    """
+    rgb = np.asarray(rgb, dtype=float).reshape(-1, 3)
+    rgb = rgb[~np.isnan(rgb).any(axis=1)]
+    if rgb.size == 0:
+        return np.full(3, np.nan)
+    if space == "lab":
+        return np.clip(lab_to_rgb(rgb_to_lab(rgb).mean(axis=0)), 0, 255)
+    if space == "linear":
+        return np.clip(linear_to_srgb(srgb_to_linear(rgb).mean(axis=0)), 0, 255)
+    if space == "srgb":
+        return rgb.mean(axis=0)
+    raise ValueError(f"Unknown color space: {space}")
@@ -0,0 +1,228 @@
+# comment_index.py
+import re
+from collections import Counter
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, Sidecar
+from profiling import timed
+
+TOKEN = re.compile(r"[a-z0-9]+(?:'[a-z0-9]+)*")
+MAX_POSITION = np.iinfo(np.uint16).max  # words past this position in a comment are not indexed
+
+# Left out of term-frequency summaries (still searchable, so phrases keep working)
+STOPWORDS = frozenset("""
+a about after all also am an and any are as at be because been but by can could did do does doesn't
+don't for from had has have i i'm if in into is isn't it it's its just me more most my no not of on
+once only or other our out so some than that the their them then there these they this to too up us
+very was we were what when which while who will with would you your
+""".split())
+
+
+def tokenize(text):
+    """Lowercase word tokens; apostrophes inside words are kept (don't, it's)."""
+    return TOKEN.findall(str(text).lower())
+
+
+# -------------------- STORAGE --------------------
+class _Column:
+    """Append-only numpy column with spare capacity.
+
+    Readers take ``view()`` without the write lock: the data is written
+    before ``size`` grows, so a view never includes unwritten slots.
+    """
+
+    def __init__(self, dtype, values=None):
+        self.values = np.empty(8, dtype=dtype) if values is None else values
+        self.size = 0 if values is None else len(values)
+
+    def extend(self, items):
+        needed = self.size + len(items)
+        values = self.values
+        if needed > len(values):
+            values = np.empty(max(needed, 2 * len(values)), dtype=values.dtype)
+            values[:self.size] = self.values[:self.size]
+        values[self.size:needed] = items
+        self.values = values
+        self.size = needed
+
+    def view(self):
+        size = self.size
+        return self.values[:size]
+
+    def __getstate__(self):
+        return self.view().copy()
+
+    def __setstate__(self, values):
+        self.__init__(values.dtype, values)
+
+
+# -------------------- WRITE PATH --------------------
+def _empty():
+    return {
+        "rows": 0,  # rows folded in so far; a row's id is its position in the CSV
+        "day": _Column(np.int32),  # days since 1970-01-01 per row
+        "app": _Column(np.uint16),
+        "theme": _Column(np.uint16),
+        "apps": [],  # code -> name
+        "themes": [],
+        "postings": {},  # term -> (row ids, word positions)
+        "terms": {},  # (day, app_type, theme) -> Counter of non-stopword terms
+    }
+
+
+def _codes(names, values):
+    """Map names to small integer codes, registering unseen names."""
+    known = set(names)
+    names.extend(name for name in pd.unique(values) if name not in known)
+    return values.map({name: code for code, name in enumerate(names)}).to_numpy(dtype=np.uint16)
+
+
+def _update(state, batch):
+    """Index the comments of a batch of rows and record each row's day, app type and theme."""
+    first = state["rows"]
+    dates = pd.to_datetime(batch["date"])
+    apps = batch["app_type"].astype(str)
+    themes = batch["theme_name"].astype(str)
+    state["day"].extend(dates.to_numpy(dtype="datetime64[D]").astype(np.int32))
+    # Readers iterate the code lists and term counters, so those are replaced, never changed in
+    # place; the columns are append-safe and the postings dict is only ever read with get()
+    state["apps"], state["themes"] = list(state["apps"]), list(state["themes"])
+    state["app"].extend(_codes(state["apps"], apps))
+    state["theme"].extend(_codes(state["themes"], themes))
+
+    comments = batch["comments"].fillna("").astype(str).to_numpy(dtype=object)
+    rows, positions, terms = [], [], []
+    for offset in np.flatnonzero(comments != ""):
+        tokens = tokenize(comments[offset])[:MAX_POSITION + 1]
+        rows.extend([first + offset] * len(tokens))
+        positions.extend(range(len(tokens)))
+        terms.extend(tokens)
+
+    if terms:
+        tokens = pd.DataFrame({"term": terms, "row": np.array(rows, dtype=np.uint32), "pos": np.array(positions, dtype=np.uint16)})
+        row_ids, word_positions = tokens["row"].to_numpy(), tokens["pos"].to_numpy()
+        for term, idx in tokens.groupby("term", sort=False).indices.items():
+            entry = state["postings"].get(term)
+            if entry is None:
+                entry = state["postings"][term] = (_Column(np.uint32), _Column(np.uint16))
+            entry[0].extend(row_ids[idx])
+            entry[1].extend(word_positions[idx])
+
+        local = tokens["row"].to_numpy().astype(np.int64) - first
+        counted = pd.DataFrame({
+            "date": dates.dt.strftime("%Y-%m-%d").to_numpy()[local],
+            "app_type": apps.to_numpy()[local],
+            "theme_name": themes.to_numpy()[local],
+            "term": tokens["term"],
+        })
+        counted = counted[~counted["term"].isin(STOPWORDS)]
+        counts = counted.groupby(["date", "app_type", "theme_name", "term"], sort=False).size().reset_index()
+        changed = {}
+        for day, app, theme, term, count in zip(*(counts[column].tolist() for column in counts.columns)):
+            counter = changed.get((day, app, theme))
+            if counter is None:
+                counter = changed[(day, app, theme)] = Counter(state["terms"].get((day, app, theme), ()))
+            counter[term] += count
+        state["terms"] = {**state["terms"], **changed}
+
+    state["rows"] = first + len(batch)
+    return state
+
+
+COMMENT_INDEX = Sidecar("comment_index", _empty, _update)
+
+
+# -------------------- READ PATH --------------------
+def parse_query(query):
+    """Split a query into phrases: each "quoted phrase" is one, every other word its own."""
+    phrases = [tokenize(phrase) for phrase in re.findall(r'"([^"]*)"', query)]
+    phrases += [[word] for word in tokenize(re.sub(r'"[^"]*"', " ", query))]
+    return [phrase for phrase in phrases if phrase]
+
+
+# Postings are appended in row order and, within a row, in word order, so every
+# array below is already sorted; merging by binary search avoids re-sorting
+def _sorted_unique(values):
+    return values[np.concatenate(([True], values[1:] != values[:-1]))] if len(values) else values
+
+
+def _sorted_intersect(a, b):
+    if not len(a) or not len(b):
+        return a[:0]
+    found = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[b[found] == a]
+
+
+def _phrase_rows(postings, phrase):
+    """Sorted ids of rows containing the words of ``phrase`` consecutively."""
+    entries = [postings.get(word) for word in phrase]
+    if any(entry is None for entry in entries):
+        return np.empty(0, dtype=np.int64)
+    if len(phrase) == 1:
+        return _sorted_unique(entries[0][0].view().astype(np.int64))
+    # Key each occurrence by (row, position the phrase would start at) and intersect
+    matches = None
+    for i, (rows, positions) in enumerate(entries):
+        rows, positions = rows.view(), positions.view()
+        n = min(len(rows), len(positions))
+        rows, start = rows[:n].astype(np.int64), positions[:n].astype(np.int64) - i
+        keys = (rows[start >= 0] << 16) | start[start >= 0]
+        matches = keys if matches is None else _sorted_intersect(matches, keys)
+    return _sorted_unique(matches >> 16)
+
+
+def _days(value):
+    return int(pd.Timestamp(value).to_datetime64().astype("datetime64[D]").astype(np.int64))
+
+
+@timed("comment_index.search")
+def search_comments(query, app_types=None, themes=None, start=None, end=None, path=DATA_PATH):
+    """Ids (CSV row positions) of rows whose comment matches every word and "phrase" in ``query``.
+
+    Results are restricted to the given app types, themes and inclusive date
+    range; None means no restriction. Matching ignores case and punctuation.
+    """
+    phrases = parse_query(query)
+    if not phrases:
+        return np.empty(0, dtype=np.int64)
+    state = COMMENT_INDEX.load(path)
+    matches = None
+    for phrase in sorted(phrases, key=len, reverse=True):
+        rows = _phrase_rows(state["postings"], phrase)
+        matches = rows if matches is None else _sorted_intersect(matches, rows)
+        if not len(matches):
+            break
+
+    # Rows of a concurrent append may be indexed before their metadata is visible
+    day = state["day"].view()
+    matches = matches[matches < len(day)]
+    keep = np.ones(len(matches), dtype=bool)
+    if app_types is not None:
+        codes = [code for code, name in enumerate(state["apps"]) if name in set(app_types)]
+        keep &= np.isin(state["app"].view()[matches], codes)
+    if themes is not None:
+        codes = [code for code, name in enumerate(state["themes"]) if name in set(themes)]
+        keep &= np.isin(state["theme"].view()[matches], codes)
+    if start is not None:
+        keep &= day[matches] >= _days(start)
+    if end is not None:
+        keep &= day[matches] <= _days(end)
+    return matches[keep]
+
+
+def term_frequencies(app_types, themes, start, end, n=10, path=DATA_PATH):
+    """Most frequent comment words (stopwords excluded) per theme within the dashboard filters."""
+    app_types, themes = set(app_types), set(themes)
+    start, end = pd.to_datetime(start).strftime("%Y-%m-%d"), pd.to_datetime(end).strftime("%Y-%m-%d")
+    per_theme = {}
+    for (day, app, theme), counter in COMMENT_INDEX.load(path)["terms"].items():
+        if app in app_types and theme in themes and start <= day <= end:
+            per_theme.setdefault(theme, Counter()).update(counter)
+
+    rows = [
+        {"theme_name": theme, "term": term, "count": count, "share": count / total}
+        for theme, counter in sorted(per_theme.items())
+        for total in [sum(counter.values())]
+        for term, count in counter.most_common(n)
+    ]
+    return pd.DataFrame(rows, columns=["theme_name", "term", "count", "share"])
@@ -0,0 +1,63 @@
+# contrast.py
+import numpy as np
+import pandas as pd
+from color_utils import NO_COLOR, packed_to_rgb, relative_luminance
+
+# WCAG 2.x minimum contrast ratios
+WCAG_AAA_TEXT = 7.0
+WCAG_AA_TEXT = 4.5
+WCAG_AA_LARGE_TEXT = 3.0
+
+
+def contrast_matrix(palettes_rgb):
+    """Pairwise WCAG contrast ratios for one palette (k, 3) or a batch of palettes (b, k, 3).
+
+    Returns a (k, k) or (b, k, k) array; the diagonal is always 1.
+    """
+    luminance = relative_luminance(np.asarray(palettes_rgb, dtype=float)) + 0.05
+    lighter = np.maximum(luminance[..., :, None], luminance[..., None, :])
+    darker = np.minimum(luminance[..., :, None], luminance[..., None, :])
+    return lighter / darker
+
+
+def wcag_level(ratios):
+    """Label contrast ratios as "AAA", "AA", "AA Large" or "Fail" (normal-size text thresholds)."""
+    ratios = np.asarray(ratios, dtype=float)
+    return np.select(
+        [ratios >= WCAG_AAA_TEXT, ratios >= WCAG_AA_TEXT, ratios >= WCAG_AA_LARGE_TEXT],
+        ["AAA", "AA", "AA Large"],
+        "Fail",
+    )
+
+
+def palette_pairs(hex_colors, palette_rgb):
+    """Every unordered color pair of a palette with its ratio and WCAG level, best contrast first."""
+    ratios = contrast_matrix(palette_rgb)
+    i, j = np.triu_indices(len(hex_colors), k=1)
+    pairs = pd.DataFrame({
+        "color_a": np.asarray(hex_colors, dtype=object)[i],
+        "color_b": np.asarray(hex_colors, dtype=object)[j],
+        "ratio": ratios[i, j],
+    })
+    pairs["level"] = wcag_level(pairs["ratio"])
+    pairs["passes_aa"] = pairs["ratio"] >= WCAG_AA_TEXT
+    return pairs.sort_values("ratio", ascending=False, ignore_index=True)
+
+
+def feedback_contrast(df):
+    """Validate text_color against background_color for every row of a compact feedback frame.
+
+    Returns a frame aligned with ``df`` holding the ratio, WCAG level and AA
+    pass flag; rows with a missing color get a NaN ratio, no level and an NA
+    flag, so shares of passing rows only count rows that could be checked.
+    """
+    text = df["text_color"].to_numpy(dtype=np.uint32)
+    background = df["background_color"].to_numpy(dtype=np.uint32)
+    ratios = contrast_matrix(np.stack([packed_to_rgb(text), packed_to_rgb(background)], axis=1))[:, 0, 1]
+    missing = (text == NO_COLOR) | (background == NO_COLOR)
+    ratios[missing] = np.nan
+    levels = wcag_level(ratios).astype(object)
+    levels[missing] = None
+    passes_aa = pd.array(ratios >= WCAG_AA_TEXT, dtype="boolean")
+    passes_aa[missing] = pd.NA
+    return pd.DataFrame({"ratio": ratios, "level": levels, "passes_aa": passes_aa}, index=df.index)
@@ -0,0 +1,150 @@
+# distinct_users.py
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, Sidecar
+
+HLL_PRECISION = 12  # 2^12 = 4096 registers
+HLL_REGISTERS = 1 << HLL_PRECISION
+HLL_RELATIVE_ERROR = 1.04 / np.sqrt(HLL_REGISTERS)  # standard error, about 1.6%
+
+# Below this many matching rows the dashboard counts user ids exactly instead
+EXACT_COUNT_MAX_ROWS = 50_000
+
+_SPARSE_LIMIT = HLL_REGISTERS // 8
+
+
+# -------------------- HYPERLOGLOG --------------------
+def hash_user_ids(values):
+    """Deterministic 64-bit hashes of user ids (pandas' vectorised SipHash)."""
+    return pd.util.hash_pandas_object(pd.Series(values).astype(str), index=False).to_numpy(dtype=np.uint64)
+
+
+def _bit_length(x):
+    n = np.zeros(x.shape, dtype=np.uint8)
+    for shift in (32, 16, 8, 4, 2, 1):
+        high = x >= (np.uint64(1) << np.uint64(shift))
+        n[high] += shift
+        x = np.where(high, x >> np.uint64(shift), x)
+    return n + (x > 0)
+
+
+class HyperLogLog:
+    """Mergeable distinct-count sketch with 2^HLL_PRECISION registers.
+
+    Small sketches keep only their non-zero registers in a dict and switch to a
+    dense uint8 array once that stops being smaller. The estimate has a
+    standard error of about HLL_RELATIVE_ERROR (1.6%); roughly 95% of
+    estimates fall within twice that of the true count.
+    """
+
+    def __init__(self):
+        self.sparse = {}
+        self.dense = None
+
+    def add_hashes(self, hashes):
+        hashes = np.asarray(hashes, dtype=np.uint64)
+        if hashes.size == 0:
+            return self
+        tail_bits = 64 - HLL_PRECISION
+        index = (hashes >> np.uint64(tail_bits)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << tail_bits) - 1)
+        rank = (tail_bits - _bit_length(remainder) + 1).astype(np.uint8)
+
+        registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        np.maximum.at(registers, index, rank)
+        return self._merge_registers(registers)
+
+    def merge(self, other):
+        if other.dense is not None:
+            return self._merge_registers(other.dense)
+        if self.dense is None and len(self.sparse) + len(other.sparse) > _SPARSE_LIMIT:
+            self.dense = self.registers()
+            self.sparse = {}
+        if self.dense is not None:
+            count = len(other.sparse)
+            index = np.fromiter(other.sparse.keys(), dtype=np.int64, count=count)
+            rank = np.fromiter(other.sparse.values(), dtype=np.uint8, count=count)
+            np.maximum.at(self.dense, index, rank)
+            return self
+        for index, rank in other.sparse.items():
+            self._set(index, rank)
+        return self
+
+    def copy(self):
+        other = HyperLogLog()
+        other.sparse = dict(self.sparse)
+        other.dense = None if self.dense is None else self.dense.copy()
+        return other
+
+    def registers(self):
+        if self.dense is not None:
+            return self.dense
+        registers = np.zeros(HLL_REGISTERS, dtype=np.uint8)
+        if self.sparse:
+            registers[list(self.sparse)] = list(self.sparse.values())
+        return registers
+
+    def estimate(self):
+        registers = self.registers().astype(float)
+        m = HLL_REGISTERS
+        alpha = 0.7213 / (1 + 1.079 / m)
+        raw = alpha * m * m / np.sum(2.0 ** -registers)
+        zeros = int((registers == 0).sum())
+        if raw <= 2.5 * m and zeros:
+            return m * np.log(m / zeros)  # linear counting for small cardinalities
+        return raw
+
+    def _set(self, index, rank):
+        if self.dense is not None:
+            self.dense[index] = max(self.dense[index], rank)
+            return
+        if rank > self.sparse.get(index, 0):
+            self.sparse[index] = rank
+            if len(self.sparse) > _SPARSE_LIMIT:
+                self.dense = self.registers()
+                self.sparse = {}
+
+    def _merge_registers(self, registers):
+        if self.dense is None and np.count_nonzero(registers) + len(self.sparse) > _SPARSE_LIMIT:
+            self.dense = self.registers()
+            self.sparse = {}
+        if self.dense is not None:
+            np.maximum(self.dense, registers, out=self.dense)
+        else:
+            for index in np.flatnonzero(registers):
+                self._set(int(index), int(registers[index]))
+        return self
+
+
+# -------------------- WRITE PATH --------------------
+def _empty():
+    return {}
+
+
+def _update(state, batch):
+    """Add hashed user ids to the sketch of their day × app_type × theme partition."""
+    keys = pd.DataFrame({
+        "date": pd.to_datetime(batch["date"]).dt.strftime("%Y-%m-%d"),
+        "app_type": batch["app_type"].astype(str),
+        "theme_name": batch["theme_name"].astype(str),
+    })
+    hashes = hash_user_ids(batch["user_id"])
+    for key, positions in keys.groupby(list(keys.columns), sort=False).indices.items():
+        sketch = state[key].copy() if key in state else HyperLogLog()  # published sketches are never changed
+        state[key] = sketch.add_hashes(hashes[positions])
+    return state
+
+
+USER_SKETCHES = Sidecar("user_sketches", _empty, _update)
+
+
+# -------------------- READ PATH --------------------
+def estimate_distinct_users(app_types, themes, start, end, path=DATA_PATH):
+    """Approximate distinct user ids for a filter by merging partition sketches."""
+    app_types, themes = set(app_types), set(themes)
+    start, end = pd.to_datetime(start).strftime("%Y-%m-%d"), pd.to_datetime(end).strftime("%Y-%m-%d")
+    merged = HyperLogLog()
+    for (day, app, theme), sketch in USER_SKETCHES.load(path).items():
+        if app in app_types and theme in themes and start <= day <= end:
+            merged.merge(sketch)
+    return int(round(merged.estimate()))
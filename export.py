@@ -0,0 +1,96 @@
+# export.py
+import gzip
+import tempfile
+import pandas as pd
+from storage import DATA_PATH, FEEDBACK_COLUMNS, iter_feedback_chunks
+from profiling import timed
+
+EXPORT_CHUNK_ROWS = 50_000
+
+EXPORT_FORMATS = {
+    "CSV (gzip)": {"extension": "csv.gz", "mime": "application/gzip"},
+    "CSV": {"extension": "csv", "mime": "text/csv"},
+    "Parquet": {"extension": "parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def parquet_available():
+    """Parquet export needs pyarrow, which is an optional dependency."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def available_formats():
+    return [name for name in EXPORT_FORMATS if name != "Parquet" or parquet_available()]
+
+
+# -------------------- FILTERED CHUNKS --------------------
+def iter_filtered_chunks(app_types, themes, start, end, path=DATA_PATH, chunksize=EXPORT_CHUNK_ROWS):
+    """Stream the feedback CSV in chunks, keeping only rows that match the dashboard filters."""
+    start, end = pd.to_datetime(start), pd.to_datetime(end)
+    for chunk in iter_feedback_chunks(path, chunksize):
+        dates = pd.to_datetime(chunk["date"])
+        mask = (
+            chunk["app_type"].isin(app_types) &
+            chunk["theme_name"].isin(themes) &
+            (dates >= start) & (dates <= end)
+        )
+        if mask.any():
+            yield chunk.loc[mask, FEEDBACK_COLUMNS]
+
+
+# -------------------- WRITERS --------------------
+def write_csv(chunks, fileobj, compress=True):
+    """Write chunks as one CSV (optionally gzip-compressed) without holding them all in memory."""
+    out = gzip.GzipFile(fileobj=fileobj, mode="wb") if compress else fileobj
+    header = True
+    for chunk in chunks:
+        out.write(chunk.to_csv(index=False, header=header).encode("utf-8"))
+        header = False
+    if header:
+        out.write(pd.DataFrame(columns=FEEDBACK_COLUMNS).to_csv(index=False).encode("utf-8"))
+    if compress:
+        out.close()
+
+
+def write_parquet(chunks, fileobj):
+    """Write chunks as row groups of one Parquet file."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (column, pa.int64() if column in ("rating", "engagement_score")
+         else pa.date32() if column == "date" else pa.string())
+        for column in FEEDBACK_COLUMNS
+    ])
+    with pq.ParquetWriter(fileobj, schema, compression="snappy") as writer:
+        for chunk in chunks:
+            chunk = chunk.astype({column: "string" for column in schema.names
+                                  if column not in ("rating", "engagement_score", "date")})
+            for column in ("rating", "engagement_score"):
+                chunk[column] = pd.to_numeric(chunk[column], errors="coerce").astype("Int64")
+            chunk["date"] = pd.to_datetime(chunk["date"]).dt.date
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+@timed("export.export_filtered")
+def export_filtered(fmt, app_types, themes, start, end, path=DATA_PATH):
+    """Generate an export through a temporary file and return its bytes.
+
+    Intended to be called lazily (e.g. as a download_button callable) so the
+    file is only built when somebody actually asks for it. The temporary file
+    is closed (and deleted) before returning.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    chunks = iter_filtered_chunks(app_types, themes, start, end, path)
+    with tempfile.TemporaryFile() as target:
+        if fmt == "Parquet":
+            write_parquet(chunks, target)
+        else:
+            write_csv(chunks, target, compress=fmt == "CSV (gzip)")
+        target.seek(0)
+        return target.read()
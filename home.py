@@ -1,9 +1,11 @@
 import streamlit as st
-from helper import render_sidebar
+from ui import render_sidebar
+from profiling import PageTimer
 
 # Page Configuration
 st.set_page_config(page_title="🎨Color Psychology System", layout="wide")
 render_sidebar()
+timer = PageTimer("home")
 
 # --- Custom CSS Styling (Full width & Pleasant theme) ---
 st.markdown("""
@@ -131,6 +133,8 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+timer.lap("css")
+
 # --- Hero Section ---
 st.markdown("""
     <div class="hero">
@@ -171,3 +175,6 @@ st.markdown("""
         </div>
     </div>
 """, unsafe_allow_html=True)
+
+timer.lap("content")
+timer.done()
@@ -0,0 +1,80 @@
+# image_dedup.py
+import threading
+from collections import OrderedDict
+import numpy as np
+from PIL import Image
+
+HASH_SIZE = 16  # 16 × 16 gradient bits per direction
+GRADIENT_BYTES = 2 * HASH_SIZE * HASH_SIZE // 8
+COLOR_GRID = 4  # 4 × 4 cells of mean RGB, so recolored variants of one layout don't match
+HASH_BYTES = GRADIENT_BYTES + COLOR_GRID * COLOR_GRID * 3
+# Screens that differ only in a clock, badge or cursor stay well under these limits
+NEAR_DUPLICATE_BITS = 24
+NEAR_DUPLICATE_COLOR = 6.0  # mean absolute difference of the color grid, 0-255 scale
+INDEX_CAPACITY = 4096
+
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def perceptual_hash(image):
+    """Perceptual fingerprint of a PIL image as HASH_BYTES bytes.
+
+    Horizontal and vertical difference hashes (dHash) of a 17×17 grayscale
+    thumbnail capture layout: each bit records whether a pixel is brighter than
+    its neighbour, so small local edits flip only a handful of bits. A 4×4 grid
+    of mean colors is appended because dHash alone ignores hue.
+    """
+    rgb = image.convert("RGB")
+    gray = np.asarray(rgb.convert("L").resize((HASH_SIZE + 1, HASH_SIZE + 1), Image.Resampling.BOX), dtype=np.int16)
+    horizontal = gray[:HASH_SIZE, 1:] > gray[:HASH_SIZE, :-1]
+    vertical = gray[1:, :HASH_SIZE] > gray[:-1, :HASH_SIZE]
+    grid = np.asarray(rgb.resize((COLOR_GRID, COLOR_GRID), Image.Resampling.BOX), dtype=np.uint8)
+    return np.packbits(np.concatenate([horizontal.ravel(), vertical.ravel()])).tobytes() + grid.tobytes()
+
+
+def fingerprint_distances(fingerprint, fingerprints):
+    """Differing gradient bits and mean color-grid difference against an (n, HASH_BYTES) array."""
+    query = np.frombuffer(fingerprint, dtype=np.uint8)
+    bits = _POPCOUNT[np.bitwise_xor(fingerprints[:, :GRADIENT_BYTES], query[:GRADIENT_BYTES])].sum(axis=1)
+    color = np.abs(fingerprints[:, GRADIENT_BYTES:].astype(np.int16) - query[GRADIENT_BYTES:]).mean(axis=1)
+    return bits, color
+
+
+class NearDuplicateIndex:
+    """Bounded, thread-safe map from perceptual hash to cached results.
+
+    Lookups scan all stored fingerprints with a vectorised popcount, which
+    takes about a millisecond at INDEX_CAPACITY entries.
+    """
+
+    def __init__(self, capacity=INDEX_CAPACITY, max_bits=NEAR_DUPLICATE_BITS, max_color=NEAR_DUPLICATE_COLOR):
+        self.capacity = capacity
+        self.max_bits = max_bits
+        self.max_color = max_color
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def find(self, fingerprint, key):
+        """Return the value stored under ``key`` for the closest near-duplicate, or None."""
+        with self._lock:
+            candidates = [(h, values) for h, values in self._entries.items() if key in values]
+            if not candidates:
+                return None
+            stored = np.frombuffer(b"".join(h for h, _ in candidates), dtype=np.uint8).reshape(-1, HASH_BYTES)
+            bits, color = fingerprint_distances(fingerprint, stored)
+            bits = np.where(color <= self.max_color, bits, np.iinfo(np.int32).max)
+            best = int(bits.argmin())
+            if bits[best] > self.max_bits:
+                return None
+            self._entries.move_to_end(candidates[best][0])
+            return candidates[best][1][key]
+
+    def add(self, fingerprint, key, value):
+        with self._lock:
+            self._entries.setdefault(fingerprint, {})[key] = value
+            self._entries.move_to_end(fingerprint)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+
+SCREENSHOT_INDEX = NearDuplicateIndex()
@@ -0,0 +1,256 @@
+# job_queue.py
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from concurrent.futures import TimeoutError
+from contextlib import closing
+
+QUEUE_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join(".queue", "jobs.sqlite3"))
+
+POLL_INTERVAL = 0.2  # seconds between polls by pages and idle workers
+HEARTBEAT_INTERVAL = 2.0
+WORKER_TIMEOUT = 15.0  # a worker silent for this long is considered dead and its job is requeued
+MAX_ATTEMPTS = 3
+RESULT_RETENTION = 24 * 3600  # finished jobs double as a cross-process result cache for a day
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    dedupe_key TEXT,
+    payload BLOB NOT NULL,
+    status TEXT NOT NULL DEFAULT 'queued',
+    result BLOB,
+    error TEXT,
+    worker TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS jobs_dedupe ON jobs (dedupe_key);
+CREATE TABLE IF NOT EXISTS workers (
+    name TEXT PRIMARY KEY,
+    pid INTEGER NOT NULL,
+    last_seen REAL NOT NULL
+);
+"""
+
+
+class JobFailed(RuntimeError):
+    """The worker raised while running the job, or the job ran out of attempts."""
+
+
+class UnknownJob(KeyError):
+    """No job with this id: it was never submitted here, or recover() dropped it after RESULT_RETENTION."""
+
+
+# -------------------- CONNECTION --------------------
+_init_lock = threading.Lock()
+_initialised = set()
+
+
+def connect(path=QUEUE_PATH):
+    """Open the queue database, creating it on first use in this process.
+
+    Connections are cheap, so callers open one per operation; that keeps them
+    safe to use from any Streamlit script thread or worker process. WAL mode
+    relies on shared memory, so every process using the queue file must run
+    on the same host (not over a network filesystem).
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    with _init_lock:
+        if path not in _initialised:
+            conn.execute("PRAGMA journal_mode=WAL")  # persistent: stored in the database file
+            conn.executescript(_SCHEMA)
+            _initialised.add(path)
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+# -------------------- PRODUCER SIDE --------------------
+def submit(kind, payload, dedupe_key=None, path=QUEUE_PATH):
+    """Queue a job and return its id.
+
+    A job with the same ``dedupe_key`` that is queued, running or finished
+    successfully is reused, so identical requests share one result; put a
+    session id in the key for results that must stay within one session.
+    """
+    with closing(connect(path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if dedupe_key is not None:
+                row = conn.execute(
+                    "SELECT id FROM jobs WHERE dedupe_key = ? AND status != 'failed' ORDER BY id DESC LIMIT 1",
+                    (dedupe_key,),
+                ).fetchone()
+                if row is not None:
+                    conn.execute("COMMIT")
+                    return row[0]
+            job_id = conn.execute(
+                "INSERT INTO jobs (kind, dedupe_key, payload, created) VALUES (?, ?, ?, ?)",
+                (kind, dedupe_key, pickle.dumps(payload, protocol=pickle.HIGHEST_PROTOCOL), time.time()),
+            ).lastrowid
+            conn.execute("COMMIT")
+            return job_id
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def job_state(job_id, path=QUEUE_PATH):
+    """``(status, position)``; position is the number of queued jobs ahead (0 once running or done)."""
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            raise UnknownJob(job_id)
+        if row[0] != "queued":
+            return row[0], 0
+        ahead = conn.execute("SELECT COUNT(*) FROM jobs WHERE status = 'queued' AND id < ?", (job_id,)).fetchone()[0]
+        return "queued", ahead
+
+
+def job_result(job_id, path=QUEUE_PATH):
+    """Result of a finished job.
+
+    Raises JobFailed if it failed, RuntimeError if it is not done yet and
+    UnknownJob if there is no such job (never submitted, or already expired).
+    """
+    with closing(connect(path)) as conn:
+        row = conn.execute("SELECT status, result, error FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        raise UnknownJob(job_id)
+    status, result, error = row
+    if status == "done":
+        return pickle.loads(result)
+    if status == "failed":
+        raise JobFailed(error)
+    raise RuntimeError(f"job {job_id} is still {status}")
+
+
+def live_workers(path=QUEUE_PATH):
+    """Number of worker processes that sent a heartbeat recently."""
+    with closing(connect(path)) as conn:
+        return conn.execute("SELECT COUNT(*) FROM workers WHERE last_seen >= ?", (time.time() - WORKER_TIMEOUT,)).fetchone()[0]
+
+
+class QueuedJob:
+    """Future-like handle on a queued job (``done``, ``result``, plus ``position`` in the queue).
+
+    ``fallback`` (a callable returning a Future) is started once if the job is
+    still unfinished while no worker is alive, and the handle then follows it
+    instead of waiting for workers that are gone.
+    """
+
+    def __init__(self, job_id, path=QUEUE_PATH, fallback=None):
+        self.job_id = job_id
+        self.path = path
+        self._status = None
+        self._fallback = fallback
+        self._local = None
+
+    @property
+    def in_process(self):
+        """True once the job has been handed to ``fallback``."""
+        return self._local is not None
+
+    def position(self):
+        if self._local is not None:
+            return 0
+        self._status, ahead = job_state(self.job_id, self.path)
+        return ahead
+
+    def done(self):
+        if self._local is not None:
+            return self._local.done()
+        if self._status not in ("done", "failed"):
+            self._status, _ = job_state(self.job_id, self.path)
+            if self._status not in ("done", "failed") and self._fallback is not None and not live_workers(self.path):
+                self._local = self._fallback()
+                return self._local.done()
+        return self._status in ("done", "failed")
+
+    def result(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done():
+            if deadline is not None and time.monotonic() >= deadline:
+                raise TimeoutError(f"job {self.job_id} did not finish in {timeout}s")
+            time.sleep(POLL_INTERVAL)
+        if self._local is not None:
+            return self._local.result()
+        return job_result(self.job_id, self.path)
+
+
+# -------------------- WORKER SIDE --------------------
+def heartbeat(name, path=QUEUE_PATH):
+    with closing(connect(path)) as conn:
+        conn.execute(
+            "INSERT INTO workers (name, pid, last_seen) VALUES (?, ?, ?) "
+            "ON CONFLICT(name) DO UPDATE SET pid = excluded.pid, last_seen = excluded.last_seen",
+            (name, os.getpid(), time.time()),
+        )
+
+
+def retire(name, path=QUEUE_PATH):
+    with closing(connect(path)) as conn:
+        conn.execute("DELETE FROM workers WHERE name = ?", (name,))
+
+
+def claim(name, path=QUEUE_PATH):
+    """Atomically take the oldest queued job; returns ``(id, kind, payload)`` or None."""
+    with closing(connect(path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute("SELECT id, kind, payload FROM jobs WHERE status = 'queued' ORDER BY id LIMIT 1").fetchone()
+        if row is None:
+            conn.execute("COMMIT")
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker = ?, started = ?, attempts = attempts + 1 WHERE id = ?",
+            (name, time.time(), row[0]),
+        )
+        conn.execute("COMMIT")
+    return row[0], row[1], pickle.loads(row[2])
+
+
+def complete(job_id, result, path=QUEUE_PATH):
+    with closing(connect(path)) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, payload = x'', finished = ? WHERE id = ?",
+            (pickle.dumps(result, protocol=pickle.HIGHEST_PROTOCOL), time.time(), job_id),
+        )
+
+
+def fail(job_id, error, path=QUEUE_PATH):
+    with closing(connect(path)) as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, payload = x'', finished = ? WHERE id = ?",
+            (error, time.time(), job_id),
+        )
+
+
+def recover(path=QUEUE_PATH):
+    """Requeue jobs held by dead workers (or fail them after MAX_ATTEMPTS) and drop old results.
+
+    Returns the number of requeued jobs.
+    """
+    now = time.time()
+    with closing(connect(path)) as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        dead = "worker NOT IN (SELECT name FROM workers WHERE last_seen >= ?)"
+        conn.execute(
+            f"UPDATE jobs SET status = 'failed', error = 'worker died {MAX_ATTEMPTS} times', finished = ? "
+            f"WHERE status = 'running' AND attempts >= ? AND {dead}",
+            (now, MAX_ATTEMPTS, now - WORKER_TIMEOUT),
+        )
+        requeued = conn.execute(
+            f"UPDATE jobs SET status = 'queued', worker = NULL WHERE status = 'running' AND {dead}",
+            (now - WORKER_TIMEOUT,),
+        ).rowcount
+        conn.execute("DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished < ?", (now - RESULT_RETENTION,))
+        conn.execute("DELETE FROM workers WHERE last_seen < ?", (now - WORKER_TIMEOUT,))
+        conn.execute("COMMIT")
+    return requeued
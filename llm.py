@@ -0,0 +1,115 @@
+# llm.py
+import os
+import threading
+from profiling import timed
+
+# Load environment variables
+# load_dotenv()
+GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
+# GEMINI_API_KEY  = st.secrets["GEMINI_API_KEY"]
+
+_genai_module = None
+_genai_lock = threading.Lock()
+
+
+def _genai():
+    """Import and configure the Gemini SDK on first use rather than when a page loads."""
+    global _genai_module
+    with _genai_lock:
+        if _genai_module is None:
+            import google.generativeai as genai
+
+            genai.configure(api_key=GEMINI_API_KEY)
+            _genai_module = genai
+    return _genai_module
+
+
+# -------------------- GEMINI SESSION SETUP --------------------
+@timed("llm.get_gemini_chat_session")
+def get_gemini_chat_session():
+    """Start a new Gemini chat session with system instructions."""
+    generation_config = {
+        "temperature": 0.3,
+        "top_p": 0.95,
+        "top_k": 64,
+        "max_output_tokens": 2048,
+        "response_mime_type": "text/plain",
+    }
+
+    safety_settings = [
+        {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_NONE"},
+        {"category": "HARM_CATEGORY_HATE_SPEECH", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_SEXUALLY_EXPLICIT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+        {"category": "HARM_CATEGORY_DANGEROUS_CONTENT", "threshold": "BLOCK_MEDIUM_AND_ABOVE"},
+    ]
+
+    model = _genai().GenerativeModel(
+        model_name="gemini-2.0-flash-lite",
+        generation_config=generation_config,
+        safety_settings=safety_settings,
+        system_instruction="""
+       You are HueBot — a specialist in color psychology, mobile app UI/UX design, and human-computer interaction.
+
+🎯 Target Audience:
+Your responses are tailored for mobile app developers, UI/UX designers, product managers, researchers, and students who seek to improve user engagement, emotional impact, and usability through effective color choices in mobile applications.
+
+🧠 Your Role:
+Assist users in designing psychologically effective color schemes for mobile apps by analyzing the emotional and cognitive impact of color combinations only. For every HEX color code you mention (e.g., #ffffff), also include a big, bar visual swatch in the response using HTML — like a bit bar with the same background color next to the code.
+
+Focus Areas:
+1. The emotional, psychological, and cognitive effects of color in mobile user interfaces.
+2. Recommending optimal color palettes based on app categories such as:
+   - Health
+   - Education
+   - Finance
+   - Social Media
+   - E-commerce
+   - Gaming
+   - Productivity
+   - Entertainment & Streaming
+   - Fitness & Wellness
+   - News & Media
+   - Travel & Hospitality
+   - Children’s Apps
+   - Mental Health & Mindfulness
+
+3. Improving user engagement, attention, trust, and retention through strategic color use.
+4. Analyzing dominant colors from uploaded UI screenshots or HEX codes and providing detailed psychological insights.
+5. Recommending improvements for contrast, readability, accessibility, and compliance with design standards such as WCAG.
+6. Encouraging inclusive, emotion-aware, and culturally sensitive UI design.
+
+🗣️ Important Instruction:
+After providing your suggestions, **always ask the user about their app's target audience** (e.g., children, teenagers, professionals, elderly, global vs local audience) to ensure your recommendations are contextually appropriate.
+
+🚫 Strict Rules:
+- ❌ Do not answer questions unrelated to color psychology or mobile UI design.
+- ❌ Do not engage in topics such as general development, backend coding, or non-visual technical concerns.
+- ✅ Only respond based on scientific research in color psychology, HCI (Human-Computer Interaction), visual UX principles, and engagement strategy.
+- ✅ Be constructive, informative, practical, and specific in your suggestions.
+
+🎯 Objective:
+Educate and guide users in selecting emotionally effective, accessible, and visually engaging color palettes that enhance usability, trust, and overall experience in mobile applications.
+
+
+Your responses should educate and guide users in selecting color palettes that enhance engagement, trust, readability, and emotional resonance in mobile apps.
+   """
+    )
+
+    return model.start_chat(history=[])
+
+
+# -------------------- GEMINI MESSAGE HANDLER --------------------
+@timed("llm.ask_gemini")
+def ask_gemini(prompt: str, chat_session) -> str:
+    """Send a prompt to Gemini and return the plain text response."""
+    response = chat_session.send_message(prompt)
+    return response.text
+
+
+def remember_exchange(chat_session, prompt: str, response: str):
+    """Record an answer obtained without ``chat_session`` in its history, so follow-ups see it."""
+    chat_session.history = [
+        *chat_session.history,
+        {"role": "user", "parts": [prompt]},
+        {"role": "model", "parts": [response]},
+    ]
@@ -1,9 +1,11 @@
 import streamlit as st
-from helper import render_sidebar
+from ui import render_sidebar
+from profiling import PageTimer
 
 # Page setup
 st.set_page_config(page_title="About This Project", layout="wide")
 render_sidebar()
+timer = PageTimer("about")
 
 # Custom CSS
 st.markdown("""
@@ -100,6 +102,8 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+timer.lap("css")
+
 # Page content
 st.markdown("""
 <div class="about-container">
@@ -154,3 +158,6 @@ st.markdown("""
   </div>
 </div>
 """, unsafe_allow_html=True)
+
+timer.lap("content")
+timer.done()
@@ -0,0 +1,82 @@
+import streamlit as st
+import hmac
+import io
+import os
+import pstats
+import pandas as pd
+import plotly.express as px
+from ui import render_sidebar
+from profiling import PROFILING_ADMIN_TOKEN, summary, reset, configure_dumps, dump_settings, list_dumps
+
+# -------------------------------
+# Page Config & Admin Gate
+# -------------------------------
+st.set_page_config(page_title="⏱️ Performance Profile", layout="wide")
+render_sidebar()
+
+st.markdown("## ⏱️ Render Profile")
+
+# Not linked from the sidebar; only usable when PROFILING_ADMIN_TOKEN is configured on the server
+if not PROFILING_ADMIN_TOKEN:
+    st.info("Profiling panel is disabled. Set the PROFILING_ADMIN_TOKEN environment variable to enable it.")
+    st.stop()
+
+if not st.session_state.get("profiling_admin"):
+    token = st.text_input("Admin token", type="password")
+    if token and hmac.compare_digest(token, PROFILING_ADMIN_TOKEN):
+        st.session_state.profiling_admin = True
+        st.rerun()
+    if token:
+        st.error("🚫 Invalid token.")
+    st.stop()
+
+# -------------------------------
+# Section Timings (all sessions)
+# -------------------------------
+col1, col2 = st.columns([1, 5])
+col1.button("🔄 Refresh")
+if col2.button("🧹 Reset timings"):
+    reset()
+
+stats = pd.DataFrame(summary())
+if stats.empty:
+    st.info("No timings recorded yet. Open a few pages first.")
+else:
+    st.caption("Percentiles cover the most recent samples of each section across every session on this server.")
+    slowest = stats.head(20).sort_values("p95_ms")
+    timing_chart = px.bar(
+        slowest,
+        x=["p50_ms", "p95_ms"],
+        y="section",
+        barmode="group",
+        orientation="h",
+        title="Slowest Sections by p95",
+        labels={"value": "Milliseconds", "section": "Section", "variable": "Percentile"},
+        template="plotly_dark",
+    )
+    st.plotly_chart(timing_chart, use_container_width=True)
+    st.dataframe(stats.round(2), use_container_width=True, hide_index=True)
+
+# -------------------------------
+# cProfile Dumps
+# -------------------------------
+st.markdown("## 🔬 cProfile Dumps")
+st.caption("Dumps wrap timed functions and blocks (e.g. `storage.*`, `extraction.kmeans`); page laps are timed only.")
+settings = dump_settings()
+with st.form("dump_settings"):
+    directory = st.text_input("Dump directory (empty disables dumps)", value=settings["directory"] or "")
+    patterns = st.text_input("Sections to profile (comma-separated glob patterns)", value=settings["patterns"])
+    if st.form_submit_button("Apply"):
+        configure_dumps(directory.strip() or None, patterns)
+        st.rerun()
+
+dumps = list_dumps()
+if dumps:
+    selected = st.selectbox("Dump", dumps, format_func=os.path.basename)
+    report = io.StringIO()
+    pstats.Stats(selected, stream=report).sort_stats("cumulative").print_stats(30)
+    st.code(report.getvalue(), language="text")
+    with open(selected, "rb") as f:
+        st.download_button("⬇️ Download .prof", f.read(), file_name=os.path.basename(selected))
+elif settings["directory"]:
+    st.info("No dumps yet. Matching sections are profiled the next time they run.")
@@ -1,11 +1,21 @@
+from concurrent.futures import TimeoutError
 import streamlit as st
-from helper import extract_dominant_colors, get_gemini_chat_session, ask_gemini, render_sidebar
+import plotly.express as px
+from ui import render_sidebar
+from llm import get_gemini_chat_session
+from color_utils import rgb_to_hex
+from palette_index import similar_palettes, PALETTE_KINDS
+from contrast import contrast_matrix, palette_pairs
+from palette_compare import distance_matrix, match_clusters
+from analysis_jobs import RESULT_TIMEOUT, SessionAnswers, get_analysis_job, extract_variants, queue_position
+from profiling import PageTimer
 
 # -------------------------------
 # Page Config & Sidebar
 # -------------------------------
 st.set_page_config(page_title="🎨 UI Color Psychology Analyzer", layout="wide")
 render_sidebar()
+timer = PageTimer("analysis")
 
 # -------------------------------
 # Global CSS Styling + Mobile
@@ -100,12 +110,102 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
+timer.lap("css")
+
 # -------------------------------
 # Page Header
 # -------------------------------
 st.markdown('<div class="title">🎨 HueBot: Color Psychology Analyzer</div>', unsafe_allow_html=True)
 st.markdown('<div class="subtitle">Upload a mobile UI screenshot and get an emotional color analysis.</div>', unsafe_allow_html=True)
 
+def waiting_message(position, task):
+    """Progress text for a background job; ``position`` is None when it runs in-process."""
+    if position:
+        return f"⏳ {task} — queued, {position} job{'s' if position > 1 else ''} ahead…"
+    return f"⏳ {task}…"
+
+
+def render_color_cards(colors):
+    """Display one card per palette color."""
+    for rgb, hex_code in zip(colors.tolist(), rgb_to_hex(colors)):
+        rgb_clean = tuple(rgb)
+        st.markdown(f"""
+            <div class="color-card">
+                <div style='background-color:{hex_code}; height:60px; border-radius:6px;'></div>
+                <div style='margin-top:0.5rem; font-size:0.9rem; color: white;' >HEX: `{hex_code}`</div>
+                <div style='font-size:0.8rem; color: white'>RGB: {rgb_clean}</div>
+            </div>
+        """, unsafe_allow_html=True)
+
+
+mode = st.radio("Mode", ["🖼️ Single Screenshot", "🆚 Compare Variants"], horizontal=True, label_visibility="collapsed")
+
+# -------------------------------
+# Compare Variants (parallel extraction, results shown as each image finishes)
+# -------------------------------
+if mode == "🆚 Compare Variants":
+    uploaded_images = st.file_uploader(
+        "📤 Drop two or more variants of the same screen (PNG or JPG)",
+        type=["jpg", "jpeg", "png"],
+        accept_multiple_files=True,
+    )
+    if not uploaded_images or len(uploaded_images) < 2:
+        st.info("Upload at least two screenshots to compare their palettes.")
+        st.stop()
+
+    variants = {f"{i + 1}. {image.name}": image.getvalue() for i, image in enumerate(uploaded_images)}
+    names = list(variants)
+    variant_cols = st.columns(min(len(names), 4))
+    placeholders = {name: variant_cols[i % len(variant_cols)].empty() for i, name in enumerate(names)}
+    for name in names:
+        placeholders[name].info(f"⏳ Extracting {name}…")
+
+    st.markdown("### 🧮 Palette Difference Matrix (ΔE 2000)")
+    diff_placeholder = st.empty()
+
+    def show_queue_position(name, position):
+        placeholders[name].info(waiting_message(position, f"Extracting {name}"))
+
+    palettes = {}
+    for name, (variant_colors, variant_weights) in extract_variants(variants, on_wait=show_queue_position):
+        palettes[name] = (variant_colors, variant_weights)
+        swatches = "".join(
+            f"<div style='background-color:{c}; flex:{w:.3f}; height:40px;'></div>"
+            for c, w in zip(rgb_to_hex(variant_colors), variant_weights)
+        )
+        with placeholders[name].container():
+            st.image(variants[name], caption=name, use_container_width=True)
+            st.markdown(f"<div style='display:flex; border-radius:6px; overflow:hidden;'>{swatches}</div>",
+                        unsafe_allow_html=True)
+
+        done = [n for n in names if n in palettes]
+        if len(done) >= 2:
+            diff_chart = px.imshow(
+                distance_matrix([palettes[n][0] for n in done]),
+                x=done,
+                y=done,
+                text_auto=".1f",
+                color_continuous_scale="Magma",
+                labels={"color": "ΔE"},
+                template="plotly_dark",
+            )
+            diff_placeholder.plotly_chart(diff_chart, use_container_width=True, key=f"diff_matrix_{len(done)}")
+    timer.lap("compare_extraction")
+
+    st.markdown("### 🎯 Matched Clusters vs. Baseline")
+    baseline = names[0]
+    for name in names[1:]:
+        st.markdown(f"**{baseline} → {name}**")
+        matches = match_clusters(*palettes[baseline], *palettes[name])
+        st.dataframe(
+            matches.round({"delta_e": 1, "delta_lightness": 1, "baseline_share": 3, "variant_share": 3, "share_delta": 3}),
+            use_container_width=True,
+            hide_index=True,
+        )
+    timer.lap("compare_matching")
+    timer.done()
+    st.stop()
+
 # -------------------------------
 # Upload Image
 # -------------------------------
@@ -117,20 +217,86 @@ if uploaded_image:
 
     # -------------------------------
     # Extract & Display Dominant Colors
+    # (coarse preview right away, full KMeans palette from a background thread)
     # -------------------------------
-    colors = extract_dominant_colors(uploaded_image, k=5)
-    hex_colors = ['#%02x%02x%02x' % tuple(map(int, c)) for c in colors]
+    job = get_analysis_job(st.session_state.setdefault("analysis_jobs", {}), uploaded_image.getvalue(), k=5)
+    timer.lap("upload")
 
-    # Display color cards responsively
-    for i, (rgb, hex_code) in enumerate(zip(colors, hex_colors)):
-        rgb_clean = tuple(int(v) for v in rgb)
-        st.markdown(f"""
-            <div class="color-card">
-                <div style='background-color:{hex_code}; height:60px; border-radius:6px;'></div>
-                <div style='margin-top:0.5rem; font-size:0.9rem; color: white;' >HEX: `{hex_code}`</div>
-                <div style='font-size:0.8rem; color: white'>RGB: {rgb_clean}</div>
-            </div>
-        """, unsafe_allow_html=True)
+    if not job.refined.done():
+        render_color_cards(job.coarse[0])
+        if job.refined_overdue():
+            st.session_state.analysis_jobs.clear()  # the next run starts over
+            st.error("🚫 Refining the palette took too long. Showing the quick preview; rerun the page to try again.")
+            timer.done()
+            st.stop()
+
+        @st.fragment(run_every=0.25)
+        def wait_for_refined_palette():
+            if job.refined.done() or job.refined_overdue():
+                st.rerun()
+            st.caption("Quick preview. " + waiting_message(queue_position(job.refined), "Refining the palette"))
+
+        wait_for_refined_palette()
+        timer.lap("preview")
+        timer.done()
+        st.stop()
+
+    colors, _ = job.refined.result()
+    hex_colors = list(rgb_to_hex(colors))
+    render_color_cards(colors)
+    timer.lap("palette")
+
+    # -------------------------------
+    # WCAG Contrast Check
+    # -------------------------------
+    st.markdown("### ♿ Contrast Check (WCAG)")
+    contrast_chart = px.imshow(
+        contrast_matrix(colors),
+        x=hex_colors,
+        y=hex_colors,
+        text_auto=".1f",
+        zmin=1,
+        zmax=21,
+        color_continuous_scale="Viridis",
+        labels={"color": "Ratio"},
+        template="plotly_dark",
+    )
+    st.plotly_chart(contrast_chart, use_container_width=True)
+
+    pairs = palette_pairs(hex_colors, colors)
+    passing = pairs[pairs["passes_aa"]]
+    if passing.empty:
+        st.warning("⚠️ No color pair in this palette reaches 4.5:1, so none is safe for body text.")
+    else:
+        st.success(
+            f"✅ {len(passing)} of {len(pairs)} color pairs pass WCAG AA for body text. "
+            f"Best pair: {passing['color_a'].iloc[0]} on {passing['color_b'].iloc[0]} "
+            f"({passing['ratio'].iloc[0]:.1f}:1, {passing['level'].iloc[0]})."
+        )
+    timer.lap("contrast")
+
+    # -------------------------------
+    # Similar Palettes from Feedback History
+    # -------------------------------
+    matches = similar_palettes(colors, k=5)
+    if not matches.empty:
+        st.markdown("### 🔍 Closest Palettes in Submitted Feedback")
+        col1, col2 = st.columns(2)
+        col1.metric("⭐ Avg Rating of Matches", round(matches["rating"].mean(), 2))
+        col2.metric("📈 Avg Engagement of Matches", round(matches["engagement_score"].mean(), 2))
+        for match in matches.itertuples(index=False):
+            swatches = "".join(
+                f"<div style='background-color:{c}; width:32px; height:24px; border-radius:4px;'></div>"
+                for c in match.palette
+            )
+            st.markdown(f"""
+                <div class="color-card" style="display:flex; align-items:center; gap:1rem; justify-content:space-between;">
+                    <div style="display:flex; gap:4px;">{swatches}</div>
+                    <div style='font-size:0.85rem; color: white;'>{PALETTE_KINDS[match.kind]} · {match.app_type} · {match.theme_name}</div>
+                    <div style='font-size:0.85rem; color: white;'>⭐ {match.rating:g} · 📈 {match.engagement_score:g} · ΔE {match.distance:.1f}</div>
+                </div>
+            """, unsafe_allow_html=True)
+    timer.lap("similar_palettes")
 
     # -------------------------------
     # Gemini Prompt Generation
@@ -138,7 +304,10 @@ if uploaded_image:
     prompt = (
         f"The dominant UI colors (in HEX) are: {', '.join(hex_colors)}. "
         f"Analyze the psychological and emotional impact of this palette on mobile app users. "
-        f"Also suggest ideal app categories this palette fits (e.g. finance, health, social, games)."
+        f"Also suggest ideal app categories this palette fits (e.g. finance, health, social, games). "
+        f"Locally computed WCAG contrast: {len(passing)} of {len(pairs)} color pairs reach 4.5:1"
+        + (f", the best being {passing['color_a'].iloc[0]} on {passing['color_b'].iloc[0]} "
+           f"({passing['ratio'].iloc[0]:.1f}:1)." if not passing.empty else ".")
     )
 
     # -------------------------------
@@ -147,14 +316,24 @@ if uploaded_image:
     if "chat_session" not in st.session_state:
         st.session_state.chat_session = get_gemini_chat_session()
 
+    # Start HueBot on the refined palette right away; the button only reveals the answer
+    answers = st.session_state.setdefault("analysis_answers", SessionAnswers())
+    analysis = job.start_llm(prompt, st.session_state.chat_session, answers)
+
     if st.button("🧠 Analyze With HueBot", key="analyze_btn"):
-        with st.spinner("HueBot is analyzing your color palette..."):
+        with st.spinner(waiting_message(queue_position(analysis), "HueBot is analyzing your color palette")):
             try:
-                response = ask_gemini(prompt, st.session_state.chat_session)
+                response = analysis.result(timeout=RESULT_TIMEOUT)
                 st.markdown("#### 💬 HueBot Says:")
                 st.markdown(f'<div class="huebot-response">{response}</div>', unsafe_allow_html=True)
+            except TimeoutError:
+                job.llm = None  # ask again on the next click
+                st.error("🚫 HueBot took too long to answer. Please try again.")
             except Exception as e:
                 st.error(f"🚫 HueBot Error: {str(e)}")
+    timer.lap("huebot")
 
 else:
     st.info("Upload your UI screenshot above to begin analysis.")
+
+timer.done()
@@ -1,14 +1,19 @@
 import streamlit as st
 import time
-from helper import get_gemini_chat_session, ask_gemini, render_sidebar
+from ui import render_sidebar
+from llm import get_gemini_chat_session, ask_gemini
+from recommender import recommendation_context
+from profiling import PageTimer, timed
 
 # --- Page Config ---
 st.set_page_config(page_title="🎨 HueBot - Color Psychology Chatbot", layout="wide")
 render_sidebar()
+timer = PageTimer("chatbot")
 
 # --- Initialize Session State ---
+if "chat_session" not in st.session_state:
+    st.session_state.chat_session = get_gemini_chat_session()
 defaults = {
-    "chat_session": get_gemini_chat_session(),
     "chat_history": [],
     "is_generating": False,
     "stop_generation": False,
@@ -18,6 +23,8 @@ defaults = {
 for key, val in defaults.items():
     st.session_state.setdefault(key, val)
 
+timer.lap("session")
+
 # --- Custom CSS ---
 st.markdown("""
 <style>
@@ -104,6 +111,8 @@ textarea {
 </style>
 """, unsafe_allow_html=True)
 
+timer.lap("css")
+
 # --- Header ---
 st.markdown(
     '<div style="text-align:center; font-size:2.5rem; color:#a78bfa; font-weight:700; padding:1rem;">🎨 HueBot - Color Psychology Chatbot</div>',
@@ -118,6 +127,8 @@ for chat in st.session_state.chat_history:
         st.markdown(f'<div class="message bot">{chat["answer"]}</div>', unsafe_allow_html=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
+timer.lap("history")
+
 # --- Typing Placeholder ---
 typing_placeholder = st.empty()
 
@@ -140,6 +151,9 @@ with st.form("chat_form", clear_on_submit=False):
         button_clicked = st.form_submit_button(button_label, use_container_width=True)
 st.markdown('</div>', unsafe_allow_html=True)
 
+timer.lap("input")
+timer.done()
+
 # --- Button Logic ---
 if button_clicked:
     if st.session_state.is_generating:
@@ -168,9 +182,12 @@ if (
     full_response = ""
     st.session_state.stop_generation = False
 
-    with st.spinner("🎨 HueBot is thinking..."):
+    with st.spinner("🎨 HueBot is thinking..."), timed("chatbot.respond"):
         typing_placeholder.markdown('<div class="message bot"><i>🎨 HueBot is typing...</i></div>', unsafe_allow_html=True)
-        response = ask_gemini(question, st.session_state.chat_session)
+        # Ground answers about specific app types in this app's own feedback history
+        context = recommendation_context(question)
+        prompt = f"{context}\n\nQuestion: {question}" if context else question
+        response = ask_gemini(prompt, st.session_state.chat_session)
 
         for char in response:
             if st.session_state.stop_generation:
@@ -1,27 +1,39 @@
 import streamlit as st
 import pandas as pd
 import os
+from functools import partial
 import plotly.express as px
-from helper import render_sidebar
+from ui import render_sidebar
+from storage import DATA_PATH, FEEDBACK_COLUMNS, load_compact_feedback
+from color_utils import NO_COLOR, packed_to_rgb, rgb_to_hex, mean_color
+from rollups import load_rollups, filter_rollups, summarize_rollups
+from color_index import top_preferred_colors
+from chart_data import box_stats, box_figure, page_count, table_page
+from export import EXPORT_FORMATS, available_formats, export_filtered
+from color_stats import FEATURE_LABELS, filtered_moments, correlations, regression, effect_sizes
+from contrast import feedback_contrast
+from distinct_users import EXACT_COUNT_MAX_ROWS, HLL_RELATIVE_ERROR, estimate_distinct_users
+from comment_index import search_comments, term_frequencies
+from recommender import SCORE_WEIGHTS, recommend_palettes, theme_scores
+from profiling import PageTimer
 
 # -------------------------------
 # Page Configuration
 # -------------------------------
 st.set_page_config(page_title="📊 Feedback Dashboard", layout="wide")
 render_sidebar()
+timer = PageTimer("dashboard")
 
 # -------------------------------
 # Load Data
 # -------------------------------
-data_path = "engagement_data.csv"
-
-if not os.path.exists(data_path):
+if not os.path.exists(DATA_PATH):
     st.warning("⚠️ No engagement data found. Submit feedback first.")
     st.stop()
 
 try:
-    df = pd.read_csv(data_path, parse_dates=["date"])
-    df.columns = df.columns.str.strip()
+    rollups = load_rollups(DATA_PATH)
+    df = load_compact_feedback(DATA_PATH)
 except Exception as e:
     st.error(f"🚫 Error loading data: {e}")
     st.stop()
@@ -29,6 +41,7 @@ except Exception as e:
 if df.empty:
     st.warning("📭 No data to display yet.")
     st.stop()
+timer.lap("load")
 
 # -------------------------------
 # Sidebar Filters
@@ -36,17 +49,17 @@ if df.empty:
 with st.sidebar:
     st.markdown("### 🔎 Filter Data")
 
-    app_types = df["app_type"].unique()
-    themes = df["theme_name"].unique()
+    app_types = rollups["app_type"].unique()
+    themes = rollups["theme_name"].unique()
 
     app_filter = st.multiselect("Filter by App Type", app_types, default=app_types)
     theme_filter = st.multiselect("Filter by Theme", themes, default=themes)
 
     date_range = st.date_input(
         "Filter by Date Range",
-        value=(df["date"].min().date(), df["date"].max().date()),
-        min_value=df["date"].min().date(),
-        max_value=df["date"].max().date(),
+        value=(rollups["date"].min().date(), rollups["date"].max().date()),
+        min_value=rollups["date"].min().date(),
+        max_value=rollups["date"].max().date(),
         key="date_range",
     )
 
@@ -60,9 +73,12 @@ filtered_df = df[
     (df["date"] <= pd.to_datetime(date_range[1]))
 ]
 
+filtered_rollups = filter_rollups(rollups, app_filter, theme_filter, date_range[0], date_range[1])
+
 if filtered_df.empty:
     st.warning("📭 No data matching filters.")
     st.stop()
+timer.lap("filters")
 
 # -------------------------------
 # Summary Metrics
@@ -71,20 +87,24 @@ st.markdown("## 📊 Engagement Overview")
 
 col1, col2, col3, col4 = st.columns(4)
 
-avg_rating = round(filtered_df["rating"].mean(), 2)
-avg_engagement = round(filtered_df["engagement_score"].mean(), 2)
-total_users = filtered_df["user_id"].nunique()
-
-# Top Preferred Colors: explode and count
-if "preferred_colors" in filtered_df.columns:
-    colors_series = filtered_df["preferred_colors"].dropna().str.split(",").explode().str.strip()
-    top_color = colors_series.mode()[0] if not colors_series.empty else "N/A"
+overview = summarize_rollups(filtered_rollups).iloc[0]
+avg_rating = round(overview["rating_mean"], 2)
+avg_engagement = round(overview["engagement_mean"], 2)
+# Exact distinct count on small selections, merged HyperLogLog sketches beyond that
+if overview["count"] <= EXACT_COUNT_MAX_ROWS:
+    total_users = len(filtered_df[["user_id_hi", "user_id_lo"]].drop_duplicates())
+    users_help = "Exact count of distinct user ids."
 else:
-    top_color = "N/A"
+    total_users = estimate_distinct_users(app_filter, theme_filter, date_range[0], date_range[1])
+    users_help = f"HyperLogLog estimate, typically within ±{HLL_RELATIVE_ERROR:.1%} (±{2 * HLL_RELATIVE_ERROR:.1%} at 95%)."
+
+# Top Preferred Colors: merge the precomputed per-partition color counters
+top_colors = top_preferred_colors(app_filter, theme_filter, date_range[0], date_range[1], n=1)
+top_color = top_colors["color"].iloc[0] if not top_colors.empty else "N/A"
 
 col1.metric("⭐ Avg Rating", avg_rating)
 col2.metric("📈 Avg Engagement", avg_engagement)
-col3.metric("👥 Total Users", total_users)
+col3.metric("👥 Total Users", total_users, help=users_help)
 
 if top_color != "N/A":
     col4.markdown("🎨 Most Preferred Color")
@@ -97,42 +117,40 @@ if top_color != "N/A":
     col4.markdown(color_html, unsafe_allow_html=True)
 else:
     col4.metric("🎨 Most Preferred Color", "N/A")
+timer.lap("overview")
 
 # -------------------------------
 # Visualizations
 # -------------------------------
 st.markdown("## 📈 Data Visualizations")
 
-# Ratings by Theme
-rating_chart = px.box(
-    filtered_df,
-    x="theme_name",
-    y="rating",
-    color="theme_name",
+# Ratings by Theme (quartiles computed here, only the summary is sent to the browser)
+rating_chart = box_figure(
+    box_stats(filtered_df, "theme_name", "rating"),
+    "theme_name",
     title="Theme Ratings Distribution",
-    template="plotly_dark",
+    value_label="rating",
 )
 st.plotly_chart(rating_chart, use_container_width=True)
 
 # Engagement by Theme
-engagement_theme = (
-    filtered_df.groupby("theme_name")["engagement_score"].mean().reset_index()
-)
+engagement_theme = summarize_rollups(filtered_rollups, by="theme_name")
 engagement_chart = px.bar(
     engagement_theme,
     x="theme_name",
-    y="engagement_score",
+    y="engagement_mean",
     color="theme_name",
     title="Average Engagement by Theme",
+    labels={"engagement_mean": "engagement_score"},
     template="plotly_dark",
 )
 st.plotly_chart(engagement_chart, use_container_width=True)
 
 # Average Rating and Engagement by App Type
 app_metrics = (
-    filtered_df.groupby("app_type")[["rating", "engagement_score"]]
-    .mean()
-    .reset_index()
+    summarize_rollups(filtered_rollups, by="app_type")
+    [["app_type", "rating_mean", "engagement_mean"]]
+    .rename(columns={"rating_mean": "rating", "engagement_mean": "engagement_score"})
 )
 app_chart = px.bar(
     app_metrics.melt(id_vars="app_type"),
@@ -145,27 +163,18 @@ app_chart = px.bar(
     template="plotly_dark",
 )
 st.plotly_chart(app_chart, use_container_width=True)
+timer.lap("charts")
 
-# Section-wise color previews - show average colors per section (convert hex colors to RGB average)
-def hex_to_rgb(hex_color):
-    hex_color = hex_color.lstrip("#")
-    return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-
-def rgb_to_hex(rgb):
-    return f"#{''.join(f'{v:02x}' for v in rgb)}"
-
+# Section-wise color previews - show average colors per section (averaged in Lab space)
 color_sections = ["landing_color", "header_color", "button_color", "background_color", "text_color"]
 
 section_colors = {}
 for section in color_sections:
     if section in filtered_df.columns:
-        # Convert hex to RGB tuples and average
-        colors = filtered_df[section].dropna().apply(hex_to_rgb)
-        if not colors.empty:
-            avg_rgb = tuple(
-                int(sum(x) / len(x)) for x in zip(*colors)
-            )
-            section_colors[section] = rgb_to_hex(avg_rgb)
+        packed = filtered_df[section].to_numpy()
+        packed = packed[packed != NO_COLOR]
+        if packed.size:
+            section_colors[section] = rgb_to_hex(mean_color(packed_to_rgb(packed)))[0]
 
 if section_colors:
     st.markdown("## 🎨 Average Section-wise Colors")
@@ -178,13 +187,181 @@ if section_colors:
                 unsafe_allow_html=True,
             )
 
+# Text/background contrast of every submission, validated in bulk
+contrast = feedback_contrast(filtered_df)
+if contrast["ratio"].notna().any():
+    st.markdown("## ♿ Text Contrast Compliance")
+    acc_col1, acc_col2 = st.columns(2)
+    acc_col1.metric(
+        "✅ Submissions passing WCAG AA",
+        f"{contrast['passes_aa'].mean():.1%}",
+        help=f"Share of the {contrast['passes_aa'].count():,} submissions with both a text and a background color.",
+    )
+    acc_col2.metric("🔤 Median Text Contrast", f"{contrast['ratio'].median():.1f}:1")
+    level_counts = (
+        contrast["level"].value_counts()
+        .reindex(["AAA", "AA", "AA Large", "Fail"], fill_value=0)
+        .rename_axis("level").reset_index(name="submissions")
+    )
+    level_chart = px.bar(
+        level_counts,
+        x="level",
+        y="submissions",
+        color="level",
+        title="WCAG Level of Text on Background",
+        template="plotly_dark",
+    )
+    st.plotly_chart(level_chart, use_container_width=True)
+timer.lap("colors")
+
+# -------------------------------
+# Preferred Color Leaderboard
+# -------------------------------
+st.markdown("## 🏆 Top 10 Preferred Colors")
+group_similar = st.checkbox("Group near-identical colors (ΔE ≤ 5)", value=False)
+leaderboard = top_preferred_colors(
+    app_filter, theme_filter, date_range[0], date_range[1],
+    n=10, max_delta_e=5.0 if group_similar else None,
+)
+
+if not leaderboard.empty:
+    leaderboard_chart = px.bar(
+        leaderboard,
+        x="color",
+        y="count",
+        color="color",
+        color_discrete_map={c: c for c in leaderboard["color"]},
+        hover_data={"share": ":.1%"},
+        title="Most Preferred Colors",
+        labels={"color": "Color", "count": "Mentions"},
+        template="plotly_dark",
+    )
+    leaderboard_chart.update_layout(showlegend=False)
+    st.plotly_chart(leaderboard_chart, use_container_width=True)
+timer.lap("leaderboard")
+
+# -------------------------------
+# Color–Engagement Analytics (from running moments, no rescan of history)
+# -------------------------------
+st.markdown("## 🔬 Color–Engagement Correlations")
+moments_all, moments_pass, moments_fail = filtered_moments(app_filter, theme_filter, date_range[0], date_range[1])
+
+if moments_all[0] > 2:
+    corr = correlations(moments_all).rename(index=FEATURE_LABELS)
+    corr_chart = px.imshow(
+        corr,
+        text_auto=".2f",
+        zmin=-1,
+        zmax=1,
+        color_continuous_scale="RdBu",
+        aspect="auto",
+        title=f"Pearson Correlation of Color Properties (n = {moments_all[0]})",
+        labels={"x": "Metric", "y": "Color Property", "color": "r"},
+        template="plotly_dark",
+    )
+    st.plotly_chart(corr_chart, use_container_width=True)
+
+    reg_col1, reg_col2 = st.columns(2)
+    for column, target in zip((reg_col1, reg_col2), ("rating", "engagement_score")):
+        coefficients, r2 = regression(moments_all, target)
+        column.metric(f"R² of color model for {target}", "N/A" if pd.isna(r2) else round(r2, 3))
+        column.dataframe(coefficients.rename(index=FEATURE_LABELS).round(3), use_container_width=True)
+
+    st.markdown("#### ♿ Effect of Passing WCAG AA Text Contrast (≥ 4.5:1)")
+    st.dataframe(effect_sizes(moments_pass, moments_fail).round(3), use_container_width=True, hide_index=True)
+else:
+    st.info("Not enough feedback in this selection to compute correlations.")
+timer.lap("correlations")
+
+# -------------------------------
+# Palette Recommendations (precomputed engagement stats + similarity to top submissions)
+# -------------------------------
+st.markdown("## 🧭 Recommended Palettes")
+recommend_app = st.selectbox("Recommend for app type", sorted(app_filter) or sorted(app_types))
+st.caption(
+    "Ranked from the whole feedback history for this app type: "
+    + ", ".join(f"{weight:.0%} {component.replace('_', ' ')}" for component, weight in SCORE_WEIGHTS.items())
+    + " (similarity to recent high-engagement submissions)."
+)
+rec_col1, rec_col2 = st.columns([3, 2])
+with rec_col1:
+    for rec in recommend_palettes(recommend_app, n=5).itertuples(index=False):
+        swatches = "".join(
+            f"<div style='background-color:{c}; width:32px; height:24px; border-radius:4px; border:1px solid #ccc'></div>"
+            for c in rec.palette
+        )
+        st.markdown(f"""
+            <div style="display:flex; align-items:center; gap:1rem; justify-content:space-between; margin-bottom:0.5rem;">
+                <div style="display:flex; gap:4px;">{swatches}</div>
+                <div style='font-size:0.85rem;'>{rec.theme_name} · score {rec.score:.1f}</div>
+                <div style='font-size:0.85rem;'>🎨 {rec.color_engagement:.1f} · 🏷️ {rec.theme_engagement:.1f} · 🔗 {rec.similarity:.0f}</div>
+            </div>
+        """, unsafe_allow_html=True)
+with rec_col2:
+    ranked_themes = theme_scores(recommend_app)
+    if not ranked_themes.empty:
+        st.dataframe(ranked_themes.round(2), use_container_width=True, hide_index=True)
+timer.lap("recommendations")
+
+# -------------------------------
+# Comment Search & Frequent Words (inverted index, no text scan)
+# -------------------------------
+st.markdown("## 💬 Comment Search")
+query = st.text_input("Search comments", placeholder='Words and "exact phrases", e.g. contrast "hard to see"')
+if query.strip():
+    matches = search_comments(query, app_filter, theme_filter, date_range[0], date_range[1])
+    matches = matches[matches < len(df)]  # rows appended after this run loaded its data
+    st.caption(f"{len(matches):,} matching comments in the current selection (newest 100 shown)")
+    if len(matches):
+        results = table_page(df.iloc[matches], "date", False, 1, 100)
+        st.dataframe(
+            results[["date", "app_type", "theme_name", "rating", "engagement_score", "comments"]],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+terms = term_frequencies(app_filter, theme_filter, date_range[0], date_range[1], n=10)
+if not terms.empty:
+    terms_chart = px.bar(
+        terms,
+        x="count",
+        y="term",
+        facet_col="theme_name",
+        facet_col_wrap=3,
+        orientation="h",
+        hover_data={"share": ":.1%"},
+        title="Most Frequent Comment Words by Theme",
+        labels={"count": "Mentions", "term": "", "theme_name": "Theme"},
+        template="plotly_dark",
+    )
+    terms_chart.update_yaxes(matches=None, showticklabels=True, categoryorder="total ascending")
+    st.plotly_chart(terms_chart, use_container_width=True)
+timer.lap("comments")
+
 # -------------------------------
 # Raw Data Table & Export
 # -------------------------------
 st.markdown("## 📋 Raw Feedback Data")
-st.dataframe(filtered_df, use_container_width=True)
 
-csv = filtered_df.to_csv(index=False).encode("utf-8")
+table_col1, table_col2, table_col3, table_col4 = st.columns(4)
+sort_by = table_col1.selectbox("Sort by", FEEDBACK_COLUMNS, index=FEEDBACK_COLUMNS.index("date"))
+sort_order = table_col2.selectbox("Order", ["Descending", "Ascending"])
+page_size = table_col3.selectbox("Rows per page", [25, 50, 100, 250], index=1)
+total_pages = page_count(len(filtered_df), page_size)
+page = table_col4.number_input("Page", min_value=1, max_value=total_pages, value=1, step=1)
+
+page_df = table_page(filtered_df, sort_by, sort_order == "Ascending", int(page), page_size)
+st.dataframe(page_df, use_container_width=True, hide_index=True)
+first_row = (int(page) - 1) * page_size + 1
+st.caption(f"Rows {first_row}–{first_row + len(page_df) - 1} of {len(filtered_df)} · page {int(page)} of {total_pages}")
+
+# The export is only generated (streamed from disk in chunks) when the button is clicked
+export_format = st.selectbox("Export format", available_formats())
 st.download_button(
-    "⬇️ Download Filtered Data as CSV", csv, file_name="filtered_feedback.csv", mime="text/csv"
+    f"⬇️ Download Filtered Data as {export_format}",
+    partial(export_filtered, export_format, app_filter, theme_filter, date_range[0], date_range[1]),
+    file_name=f"filtered_feedback.{EXPORT_FORMATS[export_format]['extension']}",
+    mime=EXPORT_FORMATS[export_format]["mime"],
 )
+timer.lap("table")
+timer.done()
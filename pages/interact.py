@@ -1,13 +1,12 @@
 import streamlit as st
-import pandas as pd
-import uuid
-import os
-from datetime import datetime
-from helper import render_sidebar
+from ui import render_sidebar
+from storage import APP_TYPES, THEME_NAMES, append_feedback, new_feedback_record
+from profiling import PageTimer, timed
 
 # Page setup
 st.set_page_config(page_title="📝 Submit Feedback", layout="wide")
 render_sidebar()
+timer = PageTimer("interact")
 
 st.markdown("## 📝 User Engagement Feedback")
 st.markdown("Please provide feedback on your experience with the app interface.")
@@ -21,16 +20,13 @@ with st.form("feedback_form"):
     with col1:
         app_type = st.selectbox(
             "App Type",
-            [
-                "Education", "E-commerce", "Health", "Gaming", "News", "Finance",
-                "Productivity", "Travel", "Social Media", "Music", "Utility", "Fitness"
-            ],
+            APP_TYPES,
             index=0
         )
 
         theme_name = st.selectbox(
             "Theme Name",
-            ["Dark Blue", "Soft Green", "Vibrant Orange", "Minimal Gray", "Neon Pink"],
+            THEME_NAMES,
             index=0
         )
 
@@ -64,6 +60,8 @@ with st.form("feedback_form"):
 
     submitted = st.form_submit_button("Submit Feedback")
 
+timer.lap("form")
+
 # -------------------------------
 # Handle Submission
 # -------------------------------
@@ -73,31 +71,16 @@ if submitted:
     if len(cleaned_colors) == 0:
         st.warning("⚠️ Please suggest at least one preferred color.")
     else:
-        feedback_data = {
-            "user_id": str(uuid.uuid4()),
-            "app_type": app_type,
-            "theme_name": theme_name,
-            "preferred_colors": ", ".join(cleaned_colors),
-            "dominant_color": dominant_color,
-            "rating": rating,
-            "engagement_score": engagement_score,
-            "comments": comments,
-            "landing_color": color_landing,
-            "header_color": color_header,
-            "button_color": color_button,
-            "background_color": color_background,
-            "text_color": color_text,
-            "date": datetime.now().strftime("%Y-%m-%d"),
-        }
-
-        df = pd.DataFrame([feedback_data])
-        file_path = "engagement_data.csv"
+        feedback_data = new_feedback_record(
+            app_type, theme_name, cleaned_colors, dominant_color, rating, engagement_score, comments,
+            color_landing, color_header, color_button, color_background, color_text,
+        )
 
         try:
-            if os.path.exists(file_path):
-                df.to_csv(file_path, mode="a", index=False, header=False)
-            else:
-                df.to_csv(file_path, index=False)
+            with timed("interact.append_feedback"):
+                append_feedback(feedback_data)
             st.success("✅ Feedback submitted successfully!")
         except Exception as e:
             st.error(f"❌ Failed to save feedback: {e}")
+
+timer.done()
@@ -0,0 +1,58 @@
+# palette_compare.py
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import os
+import numpy as np
+import pandas as pd
+from scipy.optimize import linear_sum_assignment
+from color_utils import rgb_to_lab, rgb_to_hex, pairwise_delta_e
+from palette_index import palette_distance
+
+MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+
+# -------------------- PARALLEL EXTRACTION --------------------
+def extract_in_parallel(uploads, extract, max_workers=MAX_WORKERS):
+    """Run ``extract(image_bytes)`` for every upload on a thread pool.
+
+    ``uploads`` maps a name to raw image bytes. Yields ``(name, result)`` in
+    completion order so callers can render each variant as soon as it is done.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(extract, data): name for name, data in uploads.items()}
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+# -------------------- PALETTE DIFFS --------------------
+def distance_matrix(palettes_rgb):
+    """Order-invariant palette distance (mean nearest-color CIEDE2000) between every pair of variants."""
+    labs = [rgb_to_lab(np.asarray(p, dtype=float)) for p in palettes_rgb]
+    n = len(labs)
+    matrix = np.zeros((n, n))
+    for i in range(n):
+        for j in range(i + 1, n):
+            matrix[i, j] = matrix[j, i] = palette_distance(labs[i], labs[j][None, :, :])[0]
+    return matrix
+
+
+def match_clusters(base_rgb, base_weights, other_rgb, other_weights):
+    """Pair each baseline cluster with one cluster of the other variant (minimum total ΔE).
+
+    Returns one row per matched pair with the perceptual distance, lightness
+    change and change in pixel share.
+    """
+    base_lab = rgb_to_lab(np.asarray(base_rgb, dtype=float))
+    other_lab = rgb_to_lab(np.asarray(other_rgb, dtype=float))
+    distances = pairwise_delta_e(base_lab, other_lab)
+    rows, cols = linear_sum_assignment(distances)
+    order = np.argsort(-np.asarray(base_weights)[rows], kind="stable")
+    rows, cols = rows[order], cols[order]
+    return pd.DataFrame({
+        "baseline": rgb_to_hex(np.asarray(base_rgb)[rows]),
+        "variant": rgb_to_hex(np.asarray(other_rgb)[cols]),
+        "delta_e": distances[rows, cols],
+        "delta_lightness": other_lab[cols, 0] - base_lab[rows, 0],
+        "baseline_share": np.asarray(base_weights)[rows],
+        "variant_share": np.asarray(other_weights)[cols],
+        "share_delta": np.asarray(other_weights)[cols] - np.asarray(base_weights)[rows],
+    })
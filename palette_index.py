@@ -0,0 +1,196 @@
+# palette_index.py
+import threading
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, COLOR_COLUMNS, exclusive, source_size, read_feedback_since, pack_preferred_colors
+from color_utils import NO_COLOR, pack_hex_colors, packed_to_rgb, rgb_to_lab, pairwise_delta_e, unpack_hex_colors
+from profiling import timed
+
+PALETTE_SIZE = 5
+SECTION_COLUMNS = [c for c in COLOR_COLUMNS if c != "dominant_color"]
+PALETTE_KINDS = {"preferred": "Preferred colors", "sections": "Section colors"}
+
+# Rebuild the KD-tree once the unindexed tail reaches this share of the indexed rows
+REBUILD_RATIO = 0.1
+MIN_REBUILD_ROWS = 256
+CANDIDATE_FACTOR = 8
+
+
+# -------------------- PALETTE EMBEDDING --------------------
+def _fill_palette(packed):
+    """Drop empty slots and cycle the remaining colors to PALETTE_SIZE; all-empty rows return None."""
+    valid = packed[packed != NO_COLOR]
+    if valid.size == 0:
+        return None
+    return np.resize(valid, PALETTE_SIZE)
+
+
+def palette_embedding(labs):
+    """Order-invariant fixed-length vector: the palette's Lab colors sorted by L*, a*, b*."""
+    labs = np.asarray(labs, dtype=float)
+    order = np.lexsort((labs[..., 2], labs[..., 1], labs[..., 0]), axis=-1)
+    return np.take_along_axis(labs, order[..., None], axis=-2).reshape(*labs.shape[:-2], -1)
+
+
+def palette_distance(query_lab, candidate_labs):
+    """Symmetric mean nearest-color CIEDE2000 distance between one palette and many.
+
+    Each color is matched to its closest counterpart in the other palette, so
+    the result does not depend on color order and tolerates repeated colors.
+    """
+    n, k, _ = candidate_labs.shape
+    d = pairwise_delta_e(candidate_labs.reshape(-1, 3), query_lab).reshape(n, k, len(query_lab))
+    return (d.min(axis=2).mean(axis=1) + d.min(axis=1).mean(axis=1)) / 2
+
+
+# -------------------- INDEX --------------------
+class PaletteIndex:
+    """Nearest-neighbour index over one kind of submitted palette.
+
+    Rows live in capacity-doubling arrays. New palettes form an unindexed tail
+    that is searched by brute force; the KD-tree is rebuilt over everything once
+    the tail grows past REBUILD_RATIO of the indexed rows, so each submission
+    costs amortised O(log n).
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.size = 0
+        self.indexed = 0
+        self.tree = None
+        self._columns = {
+            "packed": np.empty((0, PALETTE_SIZE), dtype=np.uint32),
+            "labs": np.empty((0, PALETTE_SIZE, 3)),
+            "embeddings": np.empty((0, PALETTE_SIZE * 3)),
+            "app_type": np.empty(0, dtype=object),
+            "theme_name": np.empty(0, dtype=object),
+            "rating": np.empty(0),
+            "engagement_score": np.empty(0),
+        }
+
+    def __len__(self):
+        return self.size
+
+    def column(self, name):
+        return self._columns[name][:self.size]
+
+    def add(self, packed, rows):
+        """Add one palette per feedback row; ``packed`` is (n, slots) uint32 aligned with ``rows``."""
+        complete = (packed != NO_COLOR).all(axis=1)
+        filled = packed.copy()
+        keep = complete.copy()
+        for i in np.flatnonzero(~complete):
+            palette = _fill_palette(packed[i])
+            if palette is not None:
+                filled[i] = palette
+                keep[i] = True
+        if not keep.any():
+            return
+
+        filled = filled[keep]
+        labs = rgb_to_lab(packed_to_rgb(filled).astype(float))
+        self._append({
+            "packed": filled,
+            "labs": labs,
+            "embeddings": palette_embedding(labs),
+            "app_type": rows["app_type"].to_numpy()[keep],
+            "theme_name": rows["theme_name"].to_numpy()[keep],
+            "rating": pd.to_numeric(rows["rating"], errors="coerce").to_numpy(dtype=float)[keep],
+            "engagement_score": pd.to_numeric(rows["engagement_score"], errors="coerce").to_numpy(dtype=float)[keep],
+        })
+
+        tail = self.size - self.indexed
+        if tail >= max(MIN_REBUILD_ROWS, REBUILD_RATIO * self.indexed):
+            from sklearn.neighbors import KDTree  # deferred so the analysis page loads without scikit-learn
+
+            self.tree = KDTree(self.column("embeddings"))
+            self.indexed = self.size
+
+    def query(self, query_lab, k=5):
+        """Return the ``k`` stored palettes closest to ``query_lab`` (an (m, 3) Lab array).
+
+        Candidates come from the KD-tree over embeddings plus the unindexed tail
+        and are re-ranked by palette_distance.
+        """
+        query_emb = palette_embedding(query_lab[np.resize(np.arange(len(query_lab)), PALETTE_SIZE)])
+        candidates = [np.arange(self.indexed, self.size)]
+        if self.tree is not None:
+            _, ids = self.tree.query(query_emb[None, :], k=min(self.indexed, k * CANDIDATE_FACTOR))
+            candidates.append(ids[0])
+        candidates = np.unique(np.concatenate(candidates))
+
+        distances = palette_distance(query_lab, self.column("labs")[candidates])
+        best = np.argsort(distances, kind="stable")[:k]
+        ids = candidates[best]
+        return pd.DataFrame({
+            "kind": self.kind,
+            "palette": [list(unpack_hex_colors(p)) for p in self.column("packed")[ids]],
+            "app_type": self.column("app_type")[ids],
+            "theme_name": self.column("theme_name")[ids],
+            "rating": self.column("rating")[ids],
+            "engagement_score": self.column("engagement_score")[ids],
+            "distance": distances[best],
+        })
+
+    def _append(self, values):
+        n = len(values["packed"])
+        capacity = len(self._columns["packed"])
+        if self.size + n > capacity:
+            capacity = max(2 * capacity, self.size + n, 64)
+            for name, column in self._columns.items():
+                grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+                grown[:self.size] = column[:self.size]
+                self._columns[name] = grown
+        for name, column in self._columns.items():
+            column[self.size:self.size + n] = values[name]
+        self.size += n
+
+
+def _new_indexes():
+    return {kind: PaletteIndex(kind) for kind in PALETTE_KINDS}
+
+
+def _add_rows(indexes, rows):
+    indexes["preferred"].add(pack_preferred_colors(rows["preferred_colors"]), rows)
+    indexes["sections"].add(np.stack([pack_hex_colors(rows[c]) for c in SECTION_COLUMNS], axis=1), rows)
+
+
+_index_lock = threading.Lock()
+_indexes = {}
+
+
+def load_palette_indexes(path=DATA_PATH):
+    """Return the in-memory palette indexes for ``path``, folding in rows appended since the last call."""
+    with _index_lock:
+        offset, indexes = _indexes.get(path, (0, None))
+        size = source_size(path)
+        if size != offset:
+            # Take the size under the write lock so it never ends inside a half-written row
+            with exclusive(path):
+                size = source_size(path)
+        if indexes is None or size < offset:
+            offset, indexes = 0, _new_indexes()
+        if size > offset:
+            rows = read_feedback_since(offset, path, end=size)
+            if len(rows):
+                _add_rows(indexes, rows)
+        _indexes[path] = (size, indexes)
+        return indexes
+
+
+@timed("palette_index.similar_palettes")
+def similar_palettes(palette_rgb, k=5, kind=None, path=DATA_PATH):
+    """Top ``k`` historical palettes closest to ``palette_rgb`` with their rating and engagement.
+
+    ``kind`` limits the search to "preferred" or "sections" palettes; by default
+    both are searched and merged.
+    """
+    query_lab = rgb_to_lab(np.asarray(palette_rgb, dtype=float).reshape(-1, 3))
+    indexes = load_palette_indexes(path)
+    kinds = [kind] if kind else list(PALETTE_KINDS)
+    results = [indexes[k_].query(query_lab, k) for k_ in kinds if len(indexes[k_])]
+    if not results:
+        return pd.DataFrame(columns=["kind", "palette", "app_type", "theme_name",
+                                     "rating", "engagement_score", "distance"])
+    merged = pd.concat(results, ignore_index=True)
+    return merged.sort_values("distance", kind="stable").head(k).reset_index(drop=True)
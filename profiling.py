@@ -0,0 +1,156 @@
+# profiling.py
+import cProfile
+import fnmatch
+import itertools
+import math
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Recent samples kept per section; percentiles describe this window, shared by every session
+SAMPLE_WINDOW = 500
+
+# cProfile dumps are off unless PROFILE_DUMP_DIR is set (or enabled from pages/admin_profiling.py)
+PROFILE_DUMP_DIR = os.getenv("PROFILE_DUMP_DIR")
+PROFILE_DUMP_SECTIONS = os.getenv("PROFILE_DUMP_SECTIONS", "*")  # comma-separated glob patterns
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")
+
+_samples = {}
+_calls = {}
+_lock = threading.Lock()
+_dumps = {"directory": PROFILE_DUMP_DIR, "patterns": PROFILE_DUMP_SECTIONS}
+_profiler_lock = threading.Lock()  # only one cProfile can be active in the process
+_dump_ids = itertools.count(1)
+
+
+# -------------------- RECORDING --------------------
+def record(section, seconds):
+    with _lock:
+        if section not in _samples:
+            _samples[section] = deque(maxlen=SAMPLE_WINDOW)
+            _calls[section] = [0, 0.0]
+        _samples[section].append(seconds)
+        _calls[section][0] += 1
+        _calls[section][1] += seconds
+
+
+@contextmanager
+def timed(section):
+    """Time a block, or every call of a function when used as ``@timed(name)``, under ``section``.
+
+    The block also runs under cProfile when dumps are enabled for the section
+    and no other profile is in progress; the dump is written even if the block
+    raises (for example Streamlit's st.stop()).
+    """
+    profiler = _start_profiler(section)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(section, time.perf_counter() - start)
+        if profiler is not None:
+            _finish_profiler(profiler, section)
+
+
+class PageTimer:
+    """Lap timer for a page script: each ``lap(name)`` records the time since the previous lap.
+
+    Laps need no indentation of the page body, and a section cut short by
+    st.stop() simply records nothing.
+    """
+
+    def __init__(self, page):
+        self.page = page
+        self.start = self.last = time.perf_counter()
+
+    def lap(self, section):
+        now = time.perf_counter()
+        record(f"{self.page}.{section}", now - self.last)
+        self.last = now
+
+    def done(self):
+        record(f"{self.page}.total", time.perf_counter() - self.start)
+
+
+# -------------------- CPROFILE DUMPS --------------------
+def configure_dumps(directory, patterns="*"):
+    """Enable cProfile dumps of matching sections into ``directory`` (None disables them)."""
+    with _lock:
+        _dumps["directory"] = directory
+        _dumps["patterns"] = patterns
+
+
+def dump_settings():
+    with _lock:
+        return dict(_dumps)
+
+
+def _start_profiler(section):
+    settings = dump_settings()
+    if not settings["directory"]:
+        return None
+    patterns = [p.strip() for p in settings["patterns"].split(",") if p.strip()]
+    if not any(fnmatch.fnmatchcase(section, p) for p in patterns):
+        return None
+    if not _profiler_lock.acquire(blocking=False):
+        return None
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:  # another profiling tool is already active
+        _profiler_lock.release()
+        return None
+    return profiler
+
+
+def _finish_profiler(profiler, section):
+    try:
+        profiler.disable()
+        directory = dump_settings()["directory"]
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            name = re.sub(r"[^\w.-]", "_", section)
+            profiler.dump_stats(os.path.join(directory, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}-{next(_dump_ids)}.prof"))
+    finally:
+        _profiler_lock.release()
+
+
+def list_dumps():
+    """Paths of the .prof files in the dump directory, newest first."""
+    directory = dump_settings()["directory"]
+    if not directory or not os.path.isdir(directory):
+        return []
+    paths = [os.path.join(directory, f) for f in os.listdir(directory) if f.endswith(".prof")]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+# -------------------- AGGREGATES --------------------
+def _percentile(ordered, q):
+    """Nearest-rank percentile of an already sorted list."""
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def summary():
+    """One dict per section: calls, total seconds and p50/p95/max over the recent window (ms)."""
+    with _lock:
+        snapshot = {section: (sorted(samples), list(_calls[section])) for section, samples in _samples.items()}
+    rows = []
+    for section, (ordered, (calls, total)) in snapshot.items():
+        rows.append({
+            "section": section,
+            "calls": calls,
+            "p50_ms": _percentile(ordered, 50) * 1000,
+            "p95_ms": _percentile(ordered, 95) * 1000,
+            "max_ms": ordered[-1] * 1000,
+            "total_s": total,
+        })
+    return sorted(rows, key=lambda row: row["p95_ms"], reverse=True)
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _calls.clear()
@@ -0,0 +1,278 @@
+# recommender.py
+import re
+import threading
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, APP_TYPES, Sidecar, pack_preferred_colors
+from color_utils import NO_COLOR, unpack_hex_colors
+from palette_index import PALETTE_SIZE, REBUILD_RATIO, MIN_REBUILD_ROWS, load_palette_indexes
+from profiling import timed
+
+COLOR_BITS = 4  # per channel; preferred colors are pooled into 16 × 16 × 16 bins
+COLOR_BINS = 1 << (3 * COLOR_BITS)
+STATS = ["count", "engagement_sum", "rating_sum"]
+
+PRIOR_WEIGHT = 20  # submissions' worth of the app-wide mean mixed into every color and theme mean
+CANDIDATE_POOL = 2000  # best-engaging distinct palettes per app type that get scored
+HIGH_ENGAGEMENT_QUANTILE = 0.9  # submissions at or above this quantile of their app type are exemplars
+MAX_EXEMPLARS = 5000  # most recent exemplars per app type
+SIMILAR_EXEMPLARS = 10  # similarity is measured against this many nearest exemplars
+SIMILARITY_DELTA_E = 25.0  # RMS Lab distance at which similarity falls to 1/e
+MIN_PALETTE_DELTA_E = 10.0  # recommended palettes differ from each other by at least this RMS Lab distance
+SCORE_WEIGHTS = {"color_engagement": 0.4, "theme_engagement": 0.2, "similarity": 0.4}
+RECOMMENDATION_COLUMNS = [
+    "palette", "theme_name", "score", "color_engagement", "theme_engagement", "similarity",
+    "engagement_score", "rating",
+]
+
+
+def color_bins(packed):
+    """Coarse color bin of packed 0xRRGGBB values (the top COLOR_BITS of each channel)."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    shift = 8 - COLOR_BITS
+    mask = (1 << COLOR_BITS) - 1
+    r, g, b = (packed >> (16 + shift)) & mask, (packed >> (8 + shift)) & mask, (packed >> shift) & mask
+    return ((r << (2 * COLOR_BITS)) | (g << COLOR_BITS) | b).astype(np.intp)
+
+
+# -------------------- WRITE PATH --------------------
+def _empty():
+    return {}
+
+
+def _update(state, batch):
+    """Add count, engagement and rating sums per app type × preferred color bin and per app type × theme."""
+    engagement = pd.to_numeric(batch["engagement_score"], errors="coerce").to_numpy(dtype=float)
+    rating = pd.to_numeric(batch["rating"], errors="coerce").to_numpy(dtype=float)
+    scored = ~np.isnan(engagement) & ~np.isnan(rating)
+    packed = pack_preferred_colors(batch["preferred_colors"])[scored]
+    engagement, rating = engagement[scored], rating[scored]
+    app_codes, apps = pd.factorize(batch["app_type"].astype(str).to_numpy()[scored])
+    theme_codes, themes = pd.factorize(batch["theme_name"].astype(str).to_numpy()[scored])
+
+    present = packed != NO_COLOR
+    slot_rows = np.broadcast_to(np.arange(len(packed))[:, None], packed.shape)[present]
+    slot_keys = app_codes[slot_rows] * COLOR_BINS + color_bins(packed[present])
+    theme_keys = app_codes * len(themes) + theme_codes
+    size = len(apps) * COLOR_BINS
+    color_sums = np.stack([
+        np.bincount(slot_keys, weights, minlength=size)
+        for weights in (None, engagement[slot_rows], rating[slot_rows])
+    ]).reshape(len(STATS), len(apps), COLOR_BINS)
+    theme_sums = np.stack([
+        np.bincount(theme_keys, weights, minlength=len(apps) * len(themes))
+        for weights in (None, engagement, rating)
+    ], axis=1)
+
+    theme_rows = np.flatnonzero(theme_sums[:, 0])
+    for code, app in enumerate(apps):
+        entry = state.get(app, {"colors": 0, "themes": {}})
+        app_themes = dict(entry["themes"])
+        for key in theme_rows[theme_rows // len(themes) == code]:
+            theme = themes[key % len(themes)]
+            acc = app_themes.get(theme)
+            app_themes[theme] = theme_sums[key] if acc is None else acc + theme_sums[key]
+        # A complete new entry replaces the published one, which readers may still be using
+        state[app] = {"colors": entry["colors"] + color_sums[:, code], "themes": app_themes}
+    return state
+
+
+ENGAGEMENT_STATS = Sidecar("engagement_stats", _empty, _update)
+
+
+# -------------------- CANDIDATES --------------------
+def _app_candidates(index, rows):
+    """Candidate palettes of one app type with their similarity to its high-engagement exemplars.
+
+    ``rows`` are the app type's positions in ``index``. Candidates are its
+    best-engaging distinct palettes; similarity is the mean RMS Lab distance
+    from each to its nearest exemplars, leaving out the candidate's own row.
+    """
+    engagement = index.column("engagement_score")[rows]
+    rating = index.column("rating")[rows]
+    scored = ~np.isnan(engagement)
+    rows, engagement, rating = rows[scored], engagement[scored], rating[scored]
+    if not len(rows):
+        return None
+
+    # Best first: engagement, then rating, then most recent; the first row of each palette stands for it
+    order = np.lexsort((-rows, -np.nan_to_num(rating), -engagement))
+    palettes = np.sort(index.column("packed")[rows[order]], axis=1)
+    _, first = np.unique(palettes, axis=0, return_index=True)
+    candidates = np.sort(first)[:CANDIDATE_POOL]
+    candidates = order[candidates]
+
+    exemplars = np.flatnonzero(engagement >= np.quantile(engagement, HIGH_ENGAGEMENT_QUANTILE))[-MAX_EXEMPLARS:]
+    embeddings = index.column("embeddings")
+    from sklearn.neighbors import KDTree  # deferred like the palette index's, so pages load without scikit-learn
+
+    tree = KDTree(embeddings[rows[exemplars]])
+    k = min(len(exemplars), SIMILAR_EXEMPLARS + 1)
+    distances, neighbours = tree.query(embeddings[rows[candidates]], k=k)
+    own = exemplars[neighbours] == candidates[:, None]
+    keep = ~own
+    keep[~own.any(axis=1), -1] = k <= SIMILAR_EXEMPLARS  # else drop the extra neighbour fetched for the self-match
+    counts = keep.sum(axis=1)
+    mean_distance = np.where(counts > 0, (distances * keep).sum(axis=1) / np.maximum(counts, 1), np.nan)
+
+    ids = rows[candidates]
+    return {
+        "packed": index.column("packed")[ids],
+        "theme_name": index.column("theme_name")[ids],
+        "engagement_score": engagement[candidates],
+        "rating": rating[candidates],
+        "embeddings": embeddings[ids],
+        "distance": mean_distance / np.sqrt(PALETTE_SIZE),
+    }
+
+
+def _build_candidates(index):
+    apps = pd.Series(index.column("app_type"))
+    codes, names = pd.factorize(apps)
+    return {
+        name: candidates
+        for code, name in enumerate(names)
+        for candidates in [_app_candidates(index, np.flatnonzero(codes == code))]
+        if candidates is not None
+    }
+
+
+_candidates_lock = threading.Lock()
+_candidates = {}
+
+
+def load_candidates(path=DATA_PATH):
+    """Per-app-type candidate palettes, rebuilt from the palette index as it grows.
+
+    Like the index's KD-tree, candidates are only rebuilt once the palettes
+    added since the last build reach REBUILD_RATIO of those it covered; the
+    color and theme statistics used for scoring are always current.
+    """
+    index = load_palette_indexes(path)["preferred"]
+    with _candidates_lock:
+        built, owner, candidates = _candidates.get(path, (0, None, None))
+        grown = len(index) - built
+        if owner is not index or candidates is None or (grown > 0 and grown >= max(MIN_REBUILD_ROWS, REBUILD_RATIO * built)):
+            with timed("recommender.build_candidates"):
+                candidates = _build_candidates(index)
+            _candidates[path] = (len(index), index, candidates)
+        return candidates
+
+
+# -------------------- READ PATH --------------------
+def _shrunk_means(sums, prior_mean):
+    """Engagement and rating means pulled towards ``prior_mean`` by PRIOR_WEIGHT pseudo-submissions."""
+    count, engagement_sum, rating_sum = sums
+    return (
+        (engagement_sum + PRIOR_WEIGHT * prior_mean[0]) / (count + PRIOR_WEIGHT),
+        (rating_sum + PRIOR_WEIGHT * prior_mean[1]) / (count + PRIOR_WEIGHT),
+    )
+
+
+def _app_means(entry):
+    count, engagement_sum, rating_sum = sum(entry["themes"].values())
+    return engagement_sum / count, rating_sum / count
+
+
+def theme_scores(app_type, path=DATA_PATH):
+    """Themes ranked by shrunk mean engagement for one app type."""
+    entry = ENGAGEMENT_STATS.load(path).get(app_type)
+    if entry is None:
+        return pd.DataFrame(columns=["theme_name", "count", "engagement_mean", "rating_mean"])
+    prior = _app_means(entry)
+    rows = []
+    for theme, sums in entry["themes"].items():
+        engagement, rating = _shrunk_means(sums, prior)
+        rows.append({"theme_name": theme, "count": int(sums[0]), "engagement_mean": engagement, "rating_mean": rating})
+    return pd.DataFrame(rows).sort_values("engagement_mean", ascending=False, kind="stable").reset_index(drop=True)
+
+
+@timed("recommender.recommend_palettes")
+def recommend_palettes(app_type, n=5, path=DATA_PATH):
+    """Top ``n`` palettes for ``app_type``, scored from its engagement history.
+
+    Each candidate gets three components on the 0-100 engagement scale: the
+    shrunk mean engagement of its colors' bins, that of its theme, and its
+    similarity to recent high-engagement submissions (100 at distance 0,
+    decaying with SIMILARITY_DELTA_E). ``score`` is their SCORE_WEIGHTS blend;
+    near-duplicates of a better palette are skipped so the suggestions differ.
+    """
+    entry = ENGAGEMENT_STATS.load(path).get(app_type)
+    candidates = load_candidates(path).get(app_type)
+    if entry is None or candidates is None:
+        return pd.DataFrame(columns=RECOMMENDATION_COLUMNS)
+
+    prior = _app_means(entry)
+    color_engagement, _ = _shrunk_means(entry["colors"], prior)
+    theme_engagement = {theme: _shrunk_means(sums, prior)[0] for theme, sums in entry["themes"].items()}
+    components = {
+        "color_engagement": color_engagement[color_bins(candidates["packed"])].mean(axis=1),
+        "theme_engagement": pd.Series(candidates["theme_name"]).map(theme_engagement).fillna(prior[0]).to_numpy(),
+        "similarity": np.nan_to_num(100 * np.exp(-candidates["distance"] / SIMILARITY_DELTA_E)),
+    }
+    score = sum(weight * components[column] for column, weight in SCORE_WEIGHTS.items())
+    best = _distinct_best(score, candidates["embeddings"], n)
+
+    return pd.DataFrame({
+        "palette": [list(dict.fromkeys(unpack_hex_colors(p))) for p in candidates["packed"][best]],
+        "theme_name": candidates["theme_name"][best],
+        "score": score[best],
+        **{column: values[best] for column, values in components.items()},
+        "engagement_score": candidates["engagement_score"][best],
+        "rating": candidates["rating"][best],
+    }, columns=RECOMMENDATION_COLUMNS)
+
+
+def _distinct_best(score, embeddings, n):
+    """Positions of the ``n`` best scores, skipping palettes within MIN_PALETTE_DELTA_E of one already picked."""
+    picked = []
+    limit = MIN_PALETTE_DELTA_E * np.sqrt(PALETTE_SIZE)
+    for i in np.argsort(-score, kind="stable"):
+        if len(picked) == n:
+            break
+        if not picked or np.linalg.norm(embeddings[picked] - embeddings[i], axis=1).min() >= limit:
+            picked.append(i)
+    return np.array(picked, dtype=np.intp)
+
+
+# -------------------- HUEBOT CONTEXT --------------------
+_APP_TYPE_PATTERNS = {
+    app: re.compile(r"\b" + r"[\s-]*".join(re.findall(r"[a-z0-9]+", app.lower())) + r"s?\b", re.IGNORECASE)
+    for app in APP_TYPES
+}
+
+
+def mentioned_app_types(text):
+    """App types named as whole words in ``text`` (case-insensitive, hyphens and spaces optional, plural allowed)."""
+    return [app for app, pattern in _APP_TYPE_PATTERNS.items() if pattern.search(str(text))]
+
+
+def recommendation_context(text, n=3, path=DATA_PATH):
+    """Local engagement findings for the app types mentioned in ``text``, to prepend to a HueBot prompt.
+
+    Returns an empty string when no app type is mentioned or there is no history for it.
+    """
+    lines = []
+    for app in mentioned_app_types(text):
+        themes = theme_scores(app, path)
+        palettes = recommend_palettes(app, n, path)
+        if themes.empty or palettes.empty:
+            continue
+        ranked = ", ".join(
+            f"{t.theme_name} (mean engagement {t.engagement_mean:.0f}, rating {t.rating_mean:.1f})"
+            for t in themes.itertuples(index=False)
+        )
+        suggested = "; ".join(
+            f"{', '.join(p.palette)} with theme {p.theme_name} (score {p.score:.0f})"
+            for p in palettes.itertuples(index=False)
+        )
+        lines.append(
+            f"- {app} apps ({int(themes['count'].sum())} submissions): themes by engagement: {ranked}. "
+            f"Top palettes: {suggested}."
+        )
+    if not lines:
+        return ""
+    return (
+        "Local feedback data from this app's users (use it to ground your answer and mention it "
+        "when relevant):\n" + "\n".join(lines)
+    )
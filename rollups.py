@@ -0,0 +1,89 @@
+# rollups.py
+import numpy as np
+import pandas as pd
+from storage import DATA_PATH, Sidecar
+
+ROLLUP_KEYS = ["date", "app_type", "theme_name"]
+ROLLUP_SUMS = [
+    "count", "rating_n", "rating_sum", "rating_sumsq", "engagement_n", "engagement_sum", "engagement_sumsq",
+]
+
+
+# -------------------- WRITE PATH --------------------
+def _empty():
+    return {}
+
+
+def _update(state, batch):
+    """Add count, sum and sum of squares per day × app_type × theme for a batch of rows.
+
+    Missing or unparsable ratings and engagement scores are left out of their
+    metric's sums and its count (``rating_n``, ``engagement_n``).
+    """
+    rating = pd.to_numeric(batch["rating"], errors="coerce").astype(float)
+    engagement = pd.to_numeric(batch["engagement_score"], errors="coerce").astype(float)
+    frame = pd.DataFrame({
+        "date": pd.to_datetime(batch["date"]).dt.strftime("%Y-%m-%d"),
+        "app_type": batch["app_type"].astype(str),
+        "theme_name": batch["theme_name"].astype(str),
+        "count": 1,
+        "rating_n": rating.notna(),
+        "rating_sum": rating,
+        "rating_sumsq": rating ** 2,
+        "engagement_n": engagement.notna(),
+        "engagement_sum": engagement,
+        "engagement_sumsq": engagement ** 2,
+    })
+    grouped = frame.groupby(ROLLUP_KEYS, sort=False)[ROLLUP_SUMS].sum().astype(float)  # NaN adds nothing
+    for key, sums in zip(grouped.index, grouped.to_numpy()):
+        acc = state.get(key)
+        state[key] = sums if acc is None else acc + sums
+    return state
+
+
+ROLLUPS = Sidecar("rollups", _empty, _update, version=2)
+
+
+# -------------------- READ PATH --------------------
+def load_rollups(path=DATA_PATH):
+    """Return one row per day × app_type × theme with running sums."""
+    state = ROLLUPS.load(path)
+    if not state:
+        return pd.DataFrame(columns=ROLLUP_KEYS + ROLLUP_SUMS)
+    keys, sums = zip(*state.items())
+    keys = pd.DataFrame(list(keys), columns=ROLLUP_KEYS)
+    keys["date"] = pd.to_datetime(keys["date"])
+    sums = pd.DataFrame(np.vstack(sums), columns=ROLLUP_SUMS)
+    return pd.concat([keys, sums], axis=1)
+
+
+def filter_rollups(rollups, app_types, themes, start, end):
+    """Apply the dashboard filters to rollup groups instead of raw rows."""
+    return rollups[
+        (rollups["app_type"].isin(app_types)) &
+        (rollups["theme_name"].isin(themes)) &
+        (rollups["date"] >= pd.to_datetime(start)) &
+        (rollups["date"] <= pd.to_datetime(end))
+    ]
+
+
+def summarize_rollups(rollups, by=None):
+    """Turn summed groups into count, mean and standard deviation per metric.
+
+    Means are taken over the rows that have a value for the metric (NaN when
+    none do). With ``by=None`` a single-row frame for the whole selection is returned.
+    """
+    if by is None:
+        totals = rollups[ROLLUP_SUMS].sum().to_frame().T
+    else:
+        totals = rollups.groupby(by)[ROLLUP_SUMS].sum().reset_index()
+
+    out = totals.drop(columns=ROLLUP_SUMS)
+    out["count"] = totals["count"].astype(int)
+    for metric in ("rating", "engagement"):
+        n = totals[f"{metric}_n"].astype(float).where(totals[f"{metric}_n"] > 0)
+        mean = totals[f"{metric}_sum"] / n
+        var = (totals[f"{metric}_sumsq"] / n - mean ** 2).clip(lower=0)
+        out[f"{metric}_mean"] = mean
+        out[f"{metric}_std"] = np.sqrt(var)
+    return out
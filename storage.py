@@ -0,0 +1,492 @@
+# storage.py
+import copy
+import io
+import os
+import pickle
+import hashlib
+import importlib
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from color_utils import NO_COLOR, hex_nibbles, pack_hex_colors, unpack_hex_colors
+from profiling import timed
+
+DATA_PATH = "engagement_data.csv"
+INDEX_DIR = ".indexes"
+
+FEEDBACK_COLUMNS = [
+    "user_id", "app_type", "theme_name", "preferred_colors", "dominant_color",
+    "rating", "engagement_score", "comments", "landing_color", "header_color",
+    "button_color", "background_color", "text_color", "date",
+]
+
+# Choices offered by the feedback form
+APP_TYPES = [
+    "Education", "E-commerce", "Health", "Gaming", "News", "Finance",
+    "Productivity", "Travel", "Social Media", "Music", "Utility", "Fitness",
+]
+THEME_NAMES = ["Dark Blue", "Soft Green", "Vibrant Orange", "Minimal Gray", "Neon Pink"]
+
+# Modules that define a Sidecar; imported on first write so they register themselves.
+INDEX_MODULES = ["rollups", "color_index", "color_stats", "distinct_users", "comment_index", "recommender"]
+
+REBUILD_CHUNK_ROWS = 100_000
+
+COLOR_COLUMNS = [
+    "dominant_color", "landing_color", "header_color",
+    "button_color", "background_color", "text_color",
+]
+MAX_PREFERRED_COLORS = 5
+PREFERRED_COLUMNS = [f"preferred_color_{i + 1}" for i in range(MAX_PREFERRED_COLORS)]
+
+SNAPSHOT_LAG_BYTES = 4 << 20  # how far a sidecar's pickle may trail the CSV; the gap is replayed from the CSV
+FINGERPRINT_BYTES = 4096
+LOCK_RETRY_INTERVAL = 0.01  # seconds between attempts on platforms without a blocking lock call
+
+_write_lock = threading.RLock()
+_sidecars = {}
+_pending_writes = {}  # path -> submissions waiting for the next group commit
+_committing = set()  # paths with a group commit in flight
+_commit_done = threading.Condition()
+_file_locks = {}  # path -> [FileLock, depth]; guarded by _write_lock
+
+
+# -------------------- RAW FEEDBACK --------------------
+def source_size(path=DATA_PATH):
+    """Size of the feedback CSV in bytes (0 when it does not exist yet)."""
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def load_feedback(path=DATA_PATH):
+    """Read the full feedback history with parsed dates."""
+    df = pd.read_csv(path, parse_dates=["date"])
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def iter_feedback_chunks(path=DATA_PATH, chunksize=REBUILD_CHUNK_ROWS):
+    """Yield the feedback history in fixed-size chunks so callers stay memory-flat."""
+    if source_size(path) == 0:
+        return
+    for chunk in pd.read_csv(path, chunksize=chunksize):
+        chunk.columns = chunk.columns.str.strip()
+        yield chunk
+
+
+def read_feedback_since(offset, path=DATA_PATH, end=None):
+    """Read only the rows appended after byte ``offset`` (a value previously returned by source_size).
+
+    The CSV is append-only, so in-memory indexes can catch up with new feedback
+    without re-reading the whole history. ``end`` (another source_size value)
+    stops at that byte instead of the end of the file.
+    """
+    if offset <= 0 and end is not None:
+        with open(path, "rb") as f:
+            data = f.read(end)
+        if not data.strip():
+            return pd.DataFrame(columns=FEEDBACK_COLUMNS)
+        rows = pd.read_csv(io.BytesIO(data))
+        rows.columns = rows.columns.str.strip()
+        return rows
+    if offset <= 0:
+        chunks = list(iter_feedback_chunks(path))
+        return pd.concat(chunks, ignore_index=True) if chunks else pd.DataFrame(columns=FEEDBACK_COLUMNS)
+    columns = pd.read_csv(path, nrows=0).columns.str.strip()
+    with open(path, "rb") as f:
+        f.seek(offset)
+        data = f.read() if end is None else f.read(end - offset)
+    if not data.strip():
+        return pd.DataFrame(columns=columns)
+    return pd.read_csv(io.BytesIO(data), names=columns, header=None)
+
+
+# -------------------- COMPACT REPRESENTATION --------------------
+def pack_user_ids(values):
+    """Pack UUID strings into 16 raw bytes (two uint64 halves); other ids are hashed to 16 bytes."""
+    return _pack_user_ids(values)[0]
+
+
+def _pack_user_ids(values):
+    """pack_user_ids plus a mask of the ids that were hashed rather than packed."""
+    values = pd.Series(values)
+    text = np.asarray(values.fillna("").to_numpy(dtype=object), dtype="U48")
+    nibbles, ok = hex_nibbles(np.char.replace(text, "-", ""), 32)
+    halves = np.zeros((len(text), 2), dtype=np.uint64)
+    weights = np.uint64(1) << np.arange(60, -1, -4, dtype=np.uint64)
+    halves[:, 0] = (nibbles[:, :16].astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    halves[:, 1] = (nibbles[:, 16:].astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    for i in np.flatnonzero(~ok):
+        digest = hashlib.blake2b(str(values.iloc[i]).encode("utf-8"), digest_size=16).digest()
+        halves[i] = np.frombuffer(digest, dtype=">u8")
+    return halves, ~ok
+
+
+def pack_preferred_colors(values):
+    """Split comma-joined preferred colors into an (n, MAX_PREFERRED_COLORS) uint32 array."""
+    values = pd.Series(values)
+    parts = values.astype("string").str.split(",", n=MAX_PREFERRED_COLORS, expand=True)
+    packed = np.full((len(values), MAX_PREFERRED_COLORS), NO_COLOR, dtype=np.uint32)
+    for i in range(MAX_PREFERRED_COLORS):
+        if i in parts.columns:
+            packed[:, i] = pack_hex_colors(parts[i])
+    return packed
+
+
+def _compact_chunk(chunk):
+    out = pd.DataFrame(index=chunk.index)
+    ids, hashed = _pack_user_ids(chunk["user_id"])
+    out["user_id_hi"] = ids[:, 0]
+    out["user_id_lo"] = ids[:, 1]
+    out["user_id_hashed"] = hashed
+    out["app_type"] = chunk["app_type"].astype("category")
+    out["theme_name"] = chunk["theme_name"].astype("category")
+    # Missing or unparsable scores stay NA instead of counting as 0; the rollups skip them too
+    for column in ("rating", "engagement_score"):
+        out[column] = pd.to_numeric(chunk[column], errors="coerce").round().clip(0, 255).astype("UInt8")
+    for column in COLOR_COLUMNS:
+        out[column] = pack_hex_colors(chunk[column])
+
+    preferred = pack_preferred_colors(chunk["preferred_colors"])
+    for i, column in enumerate(PREFERRED_COLUMNS):
+        out[column] = preferred[:, i]
+
+    out["comments"] = chunk["comments"]
+    out["date"] = pd.to_datetime(chunk["date"])
+    return out
+
+
+@timed("storage.load_compact_feedback")
+def load_compact_feedback(path=DATA_PATH, chunksize=REBUILD_CHUNK_ROWS):
+    """Read the feedback history into a compact, typed frame.
+
+    App type and theme become categoricals, rating and engagement nullable
+    UInt8 (NA where missing), user ids two uint64 halves of the 16-byte UUID
+    (ids that are not UUIDs are hashed and flagged in ``user_id_hashed``), and
+    every color (including each of the preferred colors) a uint32 0x00RRGGBB.
+    Use expand_compact_feedback to get the string columns back for display.
+    """
+    size = source_size(path)
+    memo = _compact_memo.get(path)
+    if memo is not None and memo[0] == size:
+        return memo[1]
+
+    chunks = [_compact_chunk(chunk) for chunk in iter_feedback_chunks(path, chunksize)]
+    if not chunks:
+        return _compact_chunk(pd.DataFrame(columns=FEEDBACK_COLUMNS))
+
+    df = pd.concat(chunks, ignore_index=True)
+    for column in ("app_type", "theme_name"):
+        df[column] = pd.api.types.union_categoricals([c[column] for c in chunks], sort_categories=True)
+    _compact_memo.clear()
+    _compact_memo[path] = (size, df)
+    return df
+
+
+def expand_compact_feedback(df):
+    """Turn a compact frame back into the CSV schema with hex and UUID strings.
+
+    Ids that were not UUIDs cannot be recovered; they are shown as ``hash:<hex digest>``.
+    """
+    out = pd.DataFrame(index=df.index)
+    hexes = [f"{hi:016x}{lo:016x}" for hi, lo in zip(df["user_id_hi"].tolist(), df["user_id_lo"].tolist())]
+    out["user_id"] = [
+        f"hash:{h}" if hashed else f"{h[:8]}-{h[8:12]}-{h[12:16]}-{h[16:20]}-{h[20:]}"
+        for h, hashed in zip(hexes, df["user_id_hashed"].to_numpy())
+    ]
+    out["app_type"] = df["app_type"].astype(str)
+    out["theme_name"] = df["theme_name"].astype(str)
+    preferred = pd.DataFrame(
+        {column: unpack_hex_colors(df[column]) for column in PREFERRED_COLUMNS}, index=df.index
+    )
+    out["preferred_colors"] = preferred.apply(lambda row: ", ".join(row.dropna()), axis=1)
+    for column in FEEDBACK_COLUMNS:
+        if column in COLOR_COLUMNS:
+            out[column] = unpack_hex_colors(df[column])
+        elif column in ("rating", "engagement_score", "comments", "date"):
+            out[column] = df[column]
+    return out[FEEDBACK_COLUMNS]
+
+
+_compact_memo = {}
+
+
+def new_feedback_record(app_type, theme_name, preferred_colors, dominant_color, rating, engagement_score,
+                        comments, landing_color, header_color, button_color, background_color, text_color):
+    """Row for one form submission: a fresh user id, empty color pickers dropped and today's date."""
+    return {
+        "user_id": str(uuid.uuid4()),
+        "app_type": app_type,
+        "theme_name": theme_name,
+        "preferred_colors": ", ".join(color for color in preferred_colors if color),
+        "dominant_color": dominant_color,
+        "rating": rating,
+        "engagement_score": engagement_score,
+        "comments": comments,
+        "landing_color": landing_color,
+        "header_color": header_color,
+        "button_color": button_color,
+        "background_color": background_color,
+        "text_color": text_color,
+        "date": datetime.now().strftime("%Y-%m-%d"),
+    }
+
+
+class _PendingWrite:
+    def __init__(self, record):
+        self.record = record
+        self.done = False
+        self.error = None
+
+
+def append_feedback(record, path=DATA_PATH):
+    """Append one feedback row and bring every write-time index up to date.
+
+    Submissions that arrive while another write is in progress are committed
+    together by whichever caller takes the lock next (group commit), so the
+    CSV append and index updates are paid once per group instead of per row.
+    """
+    ticket = _PendingWrite(record)
+    group = None
+    with _commit_done:
+        _pending_writes.setdefault(path, []).append(ticket)
+        while path in _committing and not ticket.done:
+            _commit_done.wait()
+        if not ticket.done:
+            # Lead the next commit, taking everything queued while the previous one ran
+            _committing.add(path)
+            group = _pending_writes.pop(path)
+
+    if group is not None:
+        error = RuntimeError("feedback write was interrupted")
+        try:
+            append_feedback_batch(pd.DataFrame([t.record for t in group], columns=FEEDBACK_COLUMNS), path)
+            error = None
+        except Exception as e:
+            error = e
+        finally:
+            # Also on KeyboardInterrupt or a Streamlit rerun/stop in this thread, or later writers wait forever
+            with _commit_done:
+                for t in group:
+                    t.done, t.error = True, error
+                _committing.discard(path)
+                _commit_done.notify_all()
+    if ticket.error is not None:
+        raise ticket.error
+
+
+@timed("storage.append_feedback_batch")
+def append_feedback_batch(batch, path=DATA_PATH):
+    """Append many feedback rows in one write and update every index once.
+
+    Safe against concurrent writers in this process (thread lock) and in other
+    processes such as workers or bulk imports (an OS lock on ``<path>.lock``).
+    """
+    for module in INDEX_MODULES:
+        importlib.import_module(module)
+
+    with exclusive(path):
+        prev_size = source_size(path)
+        batch.to_csv(path, mode="a", index=False, header=prev_size == 0)
+        tails = {}  # rows other processes appended, read once for all sidecars
+        for sidecar in _sidecars.values():
+            sidecar.apply(batch, prev_size, path, tails)
+
+
+@contextmanager
+def exclusive(path=DATA_PATH):
+    """Hold the write lock on ``path`` against other threads and other processes.
+
+    Re-entrant within a process, so an append can rebuild a stale sidecar
+    without deadlocking on its own OS lock.
+    """
+    with _write_lock:
+        entry = _file_locks.setdefault(path, [FileLock(f"{path}.lock"), 0])
+        if entry[1] == 0:
+            entry[0].acquire()
+        entry[1] += 1
+        try:
+            yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                entry[0].release()
+
+
+class FileLock:
+    """Exclusive inter-process lock held on a small lock file.
+
+    Uses flock on POSIX and msvcrt.locking on Windows; the OS drops the lock
+    if the holder dies, so a crashed writer never leaves a stale lock behind.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = None
+
+    def acquire(self):
+        self._file = open(self.path, "a+b")
+        try:
+            import fcntl
+        except ImportError:  # Windows
+            import msvcrt
+
+            while True:
+                try:
+                    self._file.seek(0)
+                    msvcrt.locking(self._file.fileno(), msvcrt.LK_NBLCK, 1)
+                    return
+                except OSError:
+                    time.sleep(LOCK_RETRY_INTERVAL)
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+
+    def release(self):
+        try:
+            try:
+                import fcntl
+            except ImportError:
+                import msvcrt
+
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._file.close()
+            self._file = None
+
+
+# -------------------- WRITE-TIME INDEXES --------------------
+def _fingerprint(path, size):
+    """Digest of the bytes just before ``size``, to tell an appended-to history from an edited one."""
+    if size <= 0:
+        return b""
+    with open(path, "rb") as f:
+        f.seek(max(0, size - FINGERPRINT_BYTES))
+        return hashlib.blake2b(f.read(min(size, FINGERPRINT_BYTES)), digest_size=16).digest()
+
+
+class Sidecar:
+    """A derived structure stored next to the CSV and updated on every write.
+
+    Writes keep the in-memory state current and re-pickle it only once the CSV
+    has grown SNAPSHOT_LAG_BYTES past the last snapshot; until then the CSV
+    itself is the journal, and loads in other processes replay the rows after
+    the snapshot. If the CSV changed behind its back (manual edit, deleted
+    index file) the sidecar is rebuilt by folding ``update`` over the history.
+
+    Loaded states are read by page threads without any lock, so they are never
+    modified once handed out: ``update`` gets a shallow copy and must replace,
+    not change in place, any nested value it touches (copy-on-write).
+
+    Bump ``version`` when the shape of the state changes; snapshots written for
+    another version are ignored and the sidecar is rebuilt.
+    """
+
+    def __init__(self, name, empty, update, version=1):
+        self.name = name
+        self.empty = empty
+        self.update = update
+        self.version = version
+        self._memo = {}  # path -> (size, fingerprint, state, snapshot size)
+        _sidecars[name] = self
+
+    def file_for(self, path):
+        folder = os.path.join(os.path.dirname(path) or ".", INDEX_DIR)
+        return os.path.join(folder, f"{os.path.basename(path)}.{self.name}.pkl")
+
+    def load(self, path=DATA_PATH):
+        """Return the index state for the current contents of ``path``."""
+        size = source_size(path)
+        with timed(f"sidecar.{self.name}.load"), _write_lock:
+            memo = self._memo.get(path)
+            if memo is not None and memo[0] == size:
+                return memo[2]
+            # Behind the file: let any writer in another process finish, then catch up
+            with exclusive(path):
+                size = source_size(path)
+                state = self._read(path, size)
+                if state is None:
+                    state = self.rebuild(path)
+                elif size - self._memo[path][3] >= SNAPSHOT_LAG_BYTES:
+                    self._write(path, size, state)
+                return state
+
+    def rebuild(self, path=DATA_PATH):
+        with timed(f"sidecar.{self.name}.rebuild"), exclusive(path):
+            state = self.empty()
+            for chunk in iter_feedback_chunks(path):
+                state = self.update(state, chunk)
+            self._write(path, source_size(path), state)
+            return state
+
+    def apply(self, batch, prev_size, path=DATA_PATH, tails=None):
+        """Fold a freshly appended batch into the index (called under the write lock)."""
+        state = self._read(path, prev_size, tails)
+        if state is None:
+            self.rebuild(path)
+            return
+        state = self._fold(state, batch)
+        size = source_size(path)
+        snapshot_size = self._memo[path][3]
+        if size - snapshot_size >= SNAPSHOT_LAG_BYTES:
+            self._write(path, size, state)
+        else:
+            self._memo[path] = (size, _fingerprint(path, size), state, snapshot_size)
+
+    def _read(self, path, size, tails=None):
+        """State for the first ``size`` bytes of ``path``, or None if it has to be rebuilt.
+
+        Starts from the memoised state (or the pickled snapshot) and replays
+        any rows appended since, provided the history before them is unchanged.
+        ``tails`` caches the replayed rows by offset for sidecars sharing a write.
+        """
+        memo = self._memo.get(path)
+        if memo is None or not self._extends(path, memo, size):
+            memo = self._read_snapshot(path)
+            if memo is None or not self._extends(path, memo, size):
+                return None
+        known_size, _, state, snapshot_size = memo
+        if known_size < size:
+            tails = {} if tails is None else tails
+            if known_size not in tails:
+                tails[known_size] = read_feedback_since(known_size, path, end=size)
+            state = self._fold(state, tails[known_size])
+        self._memo[path] = (size, _fingerprint(path, size), state, snapshot_size)
+        return state
+
+    def _fold(self, state, rows):
+        return self.update(copy.copy(state), rows)
+
+    @staticmethod
+    def _extends(path, memo, size):
+        known_size, fingerprint = memo[0], memo[1]
+        if known_size == 0:
+            return size == 0  # nothing to replay from; a header-only or new file is rebuilt
+        return known_size <= size and fingerprint == _fingerprint(path, known_size)
+
+    def _read_snapshot(self, path):
+        try:
+            with open(self.file_for(path), "rb") as f:
+                size, fingerprint, state, *version = pickle.load(f)
+        except (OSError, EOFError, ValueError, pickle.UnpicklingError):
+            return None
+        if (version[0] if version else 1) != self.version:
+            return None
+        return size, fingerprint, state, size
+
+    def _write(self, path, size, state):
+        target = self.file_for(path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.tmp"
+        fingerprint = _fingerprint(path, size)
+        with open(tmp, "wb") as f:
+            pickle.dump((size, fingerprint, state, self.version), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, target)
+        self._memo[path] = (size, fingerprint, state, size)
@@ -0,0 +1,66 @@
+# ui.py
+import streamlit as st
+from profiling import timed
+
+
+# -------------------- SIDEBAR --------------------
+@timed("ui.render_sidebar")
+def render_sidebar():
+    st.markdown("""
+        <style>
+        [data-testid="stSidebar"] {
+            background: #4f46e5;
+            padding: 2rem 1rem;
+            box-shadow: 2px 0 12px rgba(0, 0, 0, 0.1);
+            border-right: 1px solid rgba(255, 255, 255, 0.1);
+        }
+
+        .sidebar-title {
+            color: #ffffff;
+            font-size: 1.6rem;
+            font-weight: 700;
+            text-align: center;
+            margin-bottom: 2rem;
+            text-shadow: 0 0 6px rgba(255, 255, 255, 0.3);
+        }
+
+        .footer {
+            text-align: center;
+            color: #e0f2fe;
+            font-size: 0.85rem;
+            margin-top: 2rem;
+            padding-top: 1rem;
+            border-top: 1px solid rgba(255, 255, 255, 0.2);
+        }
+
+        [data-testid="stSidebarNav"] {
+            display: none !important;
+        }
+
+        /* Force white color for all sidebar page link text */
+        section[data-testid="stSidebar"] a {
+            color: #ffffff !important;
+            font-weight: 600 !important;
+        }
+
+        section[data-testid="stSidebar"] a:hover {
+            color: #e0f2fe !important;
+            background-color: rgba(255, 255, 255, 0.1) !important;
+        }
+
+        /* Optional: fix nested span text color too */
+        section[data-testid="stSidebar"] a span {
+            color: #ffffff !important;
+        }
+        </style>
+    """, unsafe_allow_html=True)
+
+    with st.sidebar:
+        st.markdown('<div class="sidebar-title">🎯 Navigation</div>', unsafe_allow_html=True)
+        st.page_link("home.py", label="🏠 Home")
+        st.page_link("pages/chatbot.py", label="🤖 Ask HueBot")
+        st.page_link("pages/analysis.py", label="📊 Analyze Screenshot")
+        st.page_link("pages/dashboard.py", label="📈 Dashboard")
+        st.page_link("pages/interact.py", label="💬 Color Theme Feedback")
+        st.page_link("pages/about.py", label="📘 About This Project")
+        st.markdown('<div class="footer">🔒 HueBot AI Integrated<br>Built with 💙 usability in mind</div>', unsafe_allow_html=True)
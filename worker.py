@@ -0,0 +1,110 @@
+# worker.py
+"""Extraction and HueBot analysis worker.
+
+Runs outside the Streamlit server and takes jobs from the SQLite queue in
+job_queue, so uploads never tie up the web process. Scale by starting more
+processes on the same host as the server (the queue is a local SQLite file
+in WAL mode, which does not work over network filesystems):
+
+    python worker.py --processes 4
+"""
+import argparse
+import io
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+import traceback
+import job_queue
+
+
+# -------------------- JOB HANDLERS --------------------
+def run_palette(payload):
+    from color_extraction import extract_palette
+
+    return extract_palette(io.BytesIO(payload["image_bytes"]), payload["k"])
+
+
+def run_analysis(payload):
+    from llm import get_gemini_chat_session, ask_gemini
+
+    return ask_gemini(payload["prompt"], get_gemini_chat_session())
+
+
+HANDLERS = {
+    "palette": run_palette,
+    "analysis": run_analysis,
+}
+
+
+# -------------------- WORKER LOOP --------------------
+def _keep_alive(name, stop, path):
+    while not stop.wait(job_queue.HEARTBEAT_INTERVAL):
+        job_queue.heartbeat(name, path)
+
+
+def work(name, path=job_queue.QUEUE_PATH, stop=None):
+    """Process jobs until ``stop`` is set (or forever)."""
+    stop = stop or threading.Event()
+    job_queue.heartbeat(name, path)
+    beat = threading.Thread(target=_keep_alive, args=(name, stop, path), daemon=True)
+    beat.start()
+    last_recovery = 0.0
+    try:
+        while not stop.is_set():
+            if time.monotonic() - last_recovery > job_queue.WORKER_TIMEOUT:
+                job_queue.recover(path)
+                last_recovery = time.monotonic()
+
+            job = job_queue.claim(name, path)
+            if job is None:
+                stop.wait(job_queue.POLL_INTERVAL)
+                continue
+
+            job_id, kind, payload = job
+            try:
+                result = HANDLERS[kind](payload)
+            except Exception:
+                job_queue.fail(job_id, traceback.format_exc(limit=5), path)
+            else:
+                job_queue.complete(job_id, result, path)
+    finally:
+        stop.set()
+        job_queue.retire(name, path)
+
+
+def _process_main(index, path):
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    work(f"{socket.gethostname()}:{os.getpid()}:{index}", path, stop)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run HueBot extraction/analysis workers.")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "2")))
+    parser.add_argument("--queue", default=job_queue.QUEUE_PATH, help="path of the SQLite job queue")
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_process_main, args=(i, args.queue)) for i in range(args.processes)]
+    for process in processes:
+        process.start()
+
+    def stop_all(*_):
+        # Children finish their current job and deregister before exiting
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+
+    signal.signal(signal.SIGTERM, stop_all)
+    signal.signal(signal.SIGINT, stop_all)
+    print(f"Started {len(processes)} worker process(es) on {args.queue}", flush=True)
+    for process in processes:
+        process.join()
+
+
+if __name__ == "__main__":
+    main()